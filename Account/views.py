@@ -1,3 +1,4 @@
+from django.db import transaction
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics
 from rest_framework.request import Request
@@ -64,3 +65,22 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         profile, _ = UserProfile.objects.get_or_create(user=self.request.user)
         return profile
+
+    def perform_update(self, serializer):
+        previous_currency = serializer.instance.base_currency
+        previous_timezone = serializer.instance.timezone
+        profile = serializer.save()
+        if profile.base_currency != previous_currency:
+            # Stored amount_base snapshots are in the old currency
+            from Tracker.tasks import rebase_user_transactions
+
+            transaction.on_commit(
+                lambda: rebase_user_transactions.delay(profile.user_id)
+            )
+        elif profile.timezone != previous_timezone:
+            # Rollup days were bucketed in the old timezone
+            from Tracker.tasks import rebuild_user_summaries
+
+            transaction.on_commit(
+                lambda: rebuild_user_summaries.delay(profile.user_id)
+            )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from Tracker.models import Category, Transaction, GeneralBudget, CategoryBudget, SavingPlan, RecurringTransaction
+from Tracker.models import Category, Transaction, GeneralBudget, CategoryBudget, SavingPlan, RecurringTransaction, ExchangeRateHistory, BudgetAlert, ImportJob
 
 admin.site.register(Category)
 admin.site.register(Transaction)
@@ -8,3 +8,6 @@ admin.site.register(GeneralBudget)
 admin.site.register(CategoryBudget)
 admin.site.register(SavingPlan)
 admin.site.register(RecurringTransaction)
+admin.site.register(ExchangeRateHistory)
+admin.site.register(BudgetAlert)
+admin.site.register(ImportJob)
@@ -0,0 +1,163 @@
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+CACHE_TTL = 300
+# How long the last computed payload stays servable under stale-while-revalidate
+STALE_TTL = 60 * 60 * 24
+REFRESH_LOCK_TTL = 60
+# Single-flight: the leader holds the lock while computing, followers poll
+COMPUTE_LOCK_TTL = 10
+COMPUTE_WAIT = 2.0
+COMPUTE_POLL_INTERVAL = 0.05
+CACHE_PREFIX = "dashboard_"
+DATA_VERSION_PREFIX = "user_data_version_"
+SIDE_EFFECTS_PREFIX = "transaction_side_effects_"
+SIDE_EFFECTS_TTL = 60 * 60 * 24
+PENDING = "pending"
+DONE = "done"
+
+# Data domains versioned independently, so a write only orphans the
+# cache entries derived from what it changed
+TRANSACTIONS = "transactions"
+BUDGETS = "budgets"
+PROFILE = "profile"
+DOMAINS = (TRANSACTIONS, BUDGETS, PROFILE)
+
+
+def _version_key(user_id, domain):
+    return f"{DATA_VERSION_PREFIX}{domain}_{user_id}"
+
+
+def _seed_version():
+    # Seed from the clock so an evicted counter never reuses old keys
+    return int(time.time() * 1000)
+
+
+def get_user_data_versions(user_id, domains=DOMAINS):
+    """
+    Return {domain: version} for a user, the namespace every derived cache
+    key of that user is built from
+    """
+    keys = {domain: _version_key(user_id, domain) for domain in domains}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for domain, key in keys.items():
+        if key not in found:
+            cache.add(key, _seed_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[domain] = found[key]
+    return versions
+
+
+def bump_user_data_version(user_id, domain=TRANSACTIONS):
+    """
+    Move a user's domain to a new version with one atomic INCR, orphaning
+    every cache entry built from the previous one
+    """
+    key = _version_key(user_id, domain)
+    cache.add(key, _seed_version(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _seed_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def dashboard_cache_key(user_id, *parts, domains=DOMAINS, versions=None):
+    """
+    Build a dashboard key embedding the versions of the domains it derives from
+    """
+    if versions is None:
+        versions = get_user_data_versions(user_id, domains)
+    tag = "v" + "-".join(str(versions[domain]) for domain in domains)
+    return "_".join([f"{CACHE_PREFIX}{user_id}", tag, *map(str, parts)])
+
+
+def dashboard_stale_key(user_id, *parts):
+    # Unversioned on purpose: it has to outlive invalidation to be served stale
+    return "_".join([f"{CACHE_PREFIX}{user_id}", "last", *map(str, parts)])
+
+
+def dashboard_refresh_key(user_id, *parts):
+    return "_".join([f"{CACHE_PREFIX}{user_id}", "refreshing", *map(str, parts)])
+
+
+def dashboard_compute_key(user_id, *parts):
+    return "_".join([f"{CACHE_PREFIX}{user_id}", "computing", *map(str, parts)])
+
+
+def single_flight(lock_key, compute, poll, wait=None):
+    """
+    Run compute() in one caller at a time.
+
+    The caller that takes the lock computes; concurrent callers call
+    poll() for up to `wait` seconds and return the first result that is
+    not None, i.e. what the leader stored. Returns None if nothing shows
+    up in time.
+    """
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, COMPUTE_LOCK_TTL):
+        try:
+            return compute()
+        finally:
+            # Only release our own lock, not one re-taken after ours expired
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    deadline = time.monotonic() + (COMPUTE_WAIT if wait is None else wait)
+    while time.monotonic() < deadline:
+        time.sleep(COMPUTE_POLL_INTERVAL)
+        value = poll()
+        if value is not None:
+            return value
+    return None
+
+
+def store_dashboard_entries(user_id, entries):
+    """
+    Store freshly computed entries under their versioned keys and as the
+    last known value of each entry; entries maps (cache_key, parts) to data
+    """
+    cache.set_many(
+        {cache_key: data for (cache_key, _), data in entries.items()}, CACHE_TTL
+    )
+    cache.set_many(
+        {
+            dashboard_stale_key(user_id, *parts): data
+            for (_, parts), data in entries.items()
+        },
+        STALE_TTL,
+    )
+
+
+def invalidate_dashboard_cache(user_id, *domains):
+    """
+    Invalidate the cached dashboard entries derived from the given domains
+    (all of them by default) once the current database transaction commits
+    """
+
+    def bump():
+        for domain in domains or DOMAINS:
+            bump_user_data_version(user_id, domain)
+
+    transaction.on_commit(bump)
+
+
+def set_transaction_side_effects(transaction_id, status, **results):
+    cache.set(
+        f"{SIDE_EFFECTS_PREFIX}{transaction_id}",
+        {"status": status, **results},
+        SIDE_EFFECTS_TTL,
+    )
+
+
+def get_transaction_side_effects(transaction_id):
+    """
+    Return the recorded post-create side effects of a transaction, None if
+    none were recorded or they expired
+    """
+    return cache.get(f"{SIDE_EFFECTS_PREFIX}{transaction_id}")
@@ -0,0 +1,119 @@
+import numpy as np
+
+DEFAULT_MAX_POINTS = 60
+DOWNSAMPLE_METHODS = ("sum", "lttb")
+LABEL_FORMATS = {"day": "%b %d", "week": "%b %d", "month": "%b %Y"}
+
+
+def calendar_axis(start, end, unit):
+    """
+    Return the gap-filled bucket starts from start to end (inclusive) as a
+    datetime64[D] array; start must already be aligned to the unit
+    """
+    if unit == "month":
+        return np.arange(
+            np.datetime64(start, "M"), np.datetime64(end, "M") + 1
+        ).astype("datetime64[D]")
+    step = 7 if unit == "week" else 1
+    return np.arange(
+        np.datetime64(start, "D"), np.datetime64(end, "D") + 1, step
+    )
+
+
+def bucket_starts(days, unit):
+    """
+    Map a datetime64[D] array to the start of each day's bucket
+    """
+    if unit == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    if unit == "week":
+        # Day 0 of the epoch is a Thursday, so (n + 3) % 7 is the ISO weekday
+        offset = (days.astype("int64") + 3) % 7
+        return days - offset.astype("timedelta64[D]")
+    return days
+
+
+def bucket_totals(axis, unit, days, amounts):
+    """
+    Sum per-day amounts into the buckets of a calendar axis
+    """
+    values = np.zeros(len(axis))
+    if not len(days):
+        return values
+    keys = bucket_starts(np.asarray(days, dtype="datetime64[D]"), unit)
+    index = np.searchsorted(axis, keys)
+    inside = index < len(axis)
+    inside[inside] = axis[index[inside]] == keys[inside]
+    np.add.at(values, index[inside], np.asarray(amounts, dtype=float)[inside])
+    return values
+
+
+def aggregate_buckets(values, max_points):
+    """
+    Sum consecutive points into max_points near-equal groups, returning the
+    index of each group's first point and the group totals; every point is
+    counted, including the tail
+    """
+    edges = np.linspace(0, len(values), max_points + 1).astype(int)[:-1]
+    return edges, np.add.reduceat(values, edges)
+
+
+def lttb_indices(values, threshold):
+    """
+    Largest-triangle-three-buckets: pick `threshold` points that keep the
+    visual shape of the series, always including the first and last
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    y = np.asarray(values, dtype=float)
+    # threshold - 2 buckets over the points between the fixed endpoints
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = [0]
+    anchor = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs(
+            (x[anchor] - avg_x) * (y[lo:hi] - y[anchor])
+            - (x[anchor] - x[lo:hi]) * (avg_y - y[anchor])
+        )
+        anchor = lo + int(np.argmax(area))
+        selected.append(anchor)
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+def build_series(
+    days, amounts, start, end, unit, max_points=DEFAULT_MAX_POINTS, downsample="sum"
+):
+    """
+    Build a gap-filled chart series of per-day amounts bucketed by unit
+    ("day", "week" or "month") from start to end, returned as aligned
+    {"labels": [...], "values": [...]}.
+
+    Series longer than max_points are reduced either by summing
+    consecutive buckets ("sum") or by LTTB point selection ("lttb").
+    """
+    if downsample not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsample method: {downsample}")
+    axis = calendar_axis(start, end, unit)
+    values = bucket_totals(axis, unit, days, amounts)
+
+    if len(axis) > max_points:
+        if downsample == "lttb":
+            index = lttb_indices(values, max_points)
+            axis, values = axis[index], values[index]
+        else:
+            index, values = aggregate_buckets(values, max_points)
+            axis = axis[index]
+
+    label_format = LABEL_FORMATS[unit]
+    return {
+        "labels": [day.strftime(label_format) for day in axis.astype(object)],
+        "values": np.round(values, 2).tolist(),
+    }
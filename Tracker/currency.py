@@ -0,0 +1,341 @@
+import time
+from bisect import bisect_right
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+PIVOT_CURRENCY = "USD"
+RATES_VERSION_KEY = "exchange_rates_version"
+RATES_VERSION_CHECK_INTERVAL = 5  # seconds between shared-cache version checks
+VECTORIZE_THRESHOLD = 256  # rows before convert_many switches to NumPy
+DEFAULT_BASE_CURRENCY = "NGN"
+
+CENT = Decimal("0.01")
+RATE_PLACES = Decimal("0.00000001")
+
+_rate_matrix = {"version": None, "rates": {}, "checked_at": 0.0}
+
+
+def get_rates_version():
+    """
+    Return the shared exchange-rate version stamp (0 when never bumped)
+    """
+    return cache.get(RATES_VERSION_KEY, 0)
+
+
+def bump_rates_version():
+    """
+    Increment the shared exchange-rate version so every process reloads
+    its rate matrix, and drop this process's copy immediately.
+    """
+    cache.add(RATES_VERSION_KEY, 0, timeout=None)
+    try:
+        version = cache.incr(RATES_VERSION_KEY)
+    except ValueError:
+        # Key was evicted between add() and incr()
+        cache.set(RATES_VERSION_KEY, 1, timeout=None)
+        version = 1
+    clear_rate_matrix()
+    return version
+
+
+def clear_rate_matrix():
+    _rate_matrix["version"] = None
+    _rate_matrix["rates"] = {}
+    _rate_matrix["checked_at"] = 0.0
+
+
+def build_cross_rates(pivot_rates, pivot=PIVOT_CURRENCY):
+    """
+    Build the full N x N rate table from {currency: units per 1 pivot}
+    quotes, triangulating every pair through the pivot currency.
+    """
+    quotes = {code: float(rate) for code, rate in pivot_rates.items() if rate}
+    quotes[pivot] = 1.0
+    return {
+        (base, target): quotes[target] / quotes[base]
+        for base in quotes
+        for target in quotes
+        if base != target
+    }
+
+
+def load_rate_matrix():
+    """
+    Load every stored exchange rate in one query and return a
+    {(from_currency, to_currency): rate} dict, filling in inverse pairs
+    that are only stored in one direction and cross pairs that can be
+    triangulated through the pivot currency.
+    """
+    from Tracker.models import CurrencyExchangeRate
+
+    rates = {}
+    for base, target, rate in CurrencyExchangeRate.objects.values_list(
+        "base_currency", "target_currency", "rate"
+    ):
+        if rate:
+            rates[(base, target)] = float(rate)
+
+    for (base, target), rate in list(rates.items()):
+        rates.setdefault((target, base), 1.0 / rate)
+
+    pivot_rates = {
+        target: rate for (base, target), rate in rates.items() if base == PIVOT_CURRENCY
+    }
+    for pair, rate in build_cross_rates(pivot_rates).items():
+        rates.setdefault(pair, rate)
+
+    return rates
+
+
+def get_rate_matrix():
+    """
+    Return this process's rate matrix, reloading it when the shared
+    version stamp has moved since it was loaded.
+    """
+    now = time.monotonic()
+    if (
+        _rate_matrix["version"] is not None
+        and now - _rate_matrix["checked_at"] < RATES_VERSION_CHECK_INTERVAL
+    ):
+        return _rate_matrix["rates"]
+
+    version = get_rates_version()
+    if version != _rate_matrix["version"]:
+        _rate_matrix["rates"] = load_rate_matrix()
+        _rate_matrix["version"] = version
+    _rate_matrix["checked_at"] = now
+    return _rate_matrix["rates"]
+
+
+def get_rate(from_currency, to_currency):
+    """
+    Return the multiplier converting from_currency into to_currency,
+    or None when no rate is known.
+    """
+    if from_currency == to_currency:
+        return 1.0
+    return get_rate_matrix().get((from_currency, to_currency))
+
+
+def rate_as_of(from_currency, to_currency, on):
+    """
+    Return the rate that was in effect on the given date, using the
+    current matrix for today (or no date) and when no history exists.
+    """
+    if from_currency == to_currency:
+        return 1.0
+    if on is None or on >= timezone.localdate():
+        return get_rate(from_currency, to_currency)
+
+    from Tracker.models import ExchangeRateHistory
+
+    rate = (
+        ExchangeRateHistory.objects.filter(
+            base_currency=from_currency,
+            target_currency=to_currency,
+            effective_date__lte=on,
+        )
+        .order_by("-effective_date")
+        .values_list("rate", flat=True)
+        .first()
+    )
+    if rate is None:
+        return get_rate(from_currency, to_currency)
+    return float(rate)
+
+
+class RateHistory:
+    """
+    Date-effective rates for a handful of currency pairs, loaded in one
+    query for bulk work such as rebasing a user's transactions.
+    """
+
+    def __init__(self, pairs):
+        from Tracker.models import ExchangeRateHistory
+
+        self.series = {}
+        pairs = [(base, target) for base, target in pairs if base != target]
+        if not pairs:
+            return
+        pair_q = Q()
+        for base, target in pairs:
+            pair_q |= Q(base_currency=base, target_currency=target)
+        for base, target, effective_date, rate in (
+            ExchangeRateHistory.objects.filter(pair_q)
+            .order_by("effective_date")
+            .values_list("base_currency", "target_currency", "effective_date", "rate")
+        ):
+            dates, rates = self.series.setdefault((base, target), ([], []))
+            dates.append(effective_date)
+            rates.append(float(rate))
+
+    def rate(self, from_currency, to_currency, on):
+        if from_currency == to_currency:
+            return 1.0
+        dates, rates = self.series.get((from_currency, to_currency), ([], []))
+        if on is not None and on < timezone.localdate():
+            index = bisect_right(dates, on) - 1
+            if index >= 0:
+                return rates[index]
+        return get_rate(from_currency, to_currency)
+
+
+def convert_many(rows, amount_key, currency_key, to_currency, vectorize=None):
+    """
+    Convert the amount_key of every row (e.g. a .values().annotate() result)
+    into to_currency. Rows are grouped by currency so each rate is looked
+    up once; large result sets are converted with one NumPy multiply.
+    Returns a list of floats aligned with rows. Amounts with no known rate
+    are left unconverted, matching convert_currency.
+    """
+    rows = rows if isinstance(rows, list) else list(rows)
+    if not rows:
+        return []
+
+    if vectorize is None:
+        vectorize = len(rows) >= VECTORIZE_THRESHOLD
+
+    if vectorize:
+        codes, group_index = np.unique(
+            [row[currency_key] for row in rows], return_inverse=True
+        )
+        group_rates = np.array(
+            [_multiplier(code, to_currency) for code in codes.tolist()], dtype=float
+        )
+        amounts = np.fromiter(
+            (float(row[amount_key] or 0) for row in rows), dtype=float, count=len(rows)
+        )
+        return (amounts * group_rates[group_index]).tolist()
+
+    multipliers = {}
+    for row in rows:
+        code = row[currency_key]
+        if code not in multipliers:
+            multipliers[code] = _multiplier(code, to_currency)
+    return [float(row[amount_key] or 0) * multipliers[row[currency_key]] for row in rows]
+
+
+def _multiplier(from_currency, to_currency):
+    rate = get_rate(from_currency, to_currency)
+    return 1.0 if rate is None else rate
+
+
+def get_user_base_currency(user):
+    try:
+        return user.profile.base_currency
+    except user._meta.model.profile.RelatedObjectDoesNotExist:
+        return DEFAULT_BASE_CURRENCY
+
+
+def to_base_amount(amount, currency, base_currency, on=None, history=None):
+    """
+    Return the (amount_base, exchange_rate) snapshot stored on a Transaction,
+    using the rate in effect on the given date, or (None, None) when there
+    is no amount or no known rate.
+    """
+    if amount is None:
+        return None, None
+    if history is not None:
+        rate = history.rate(currency, base_currency, on)
+    else:
+        rate = rate_as_of(currency, base_currency, on)
+    if rate is None:
+        return None, None
+    rate = Decimal(repr(rate))
+    return (Decimal(amount) * rate).quantize(CENT), rate.quantize(RATE_PLACES)
+
+
+def stale_base_amount_q(base_currency):
+    """
+    Rows whose amount_base snapshot cannot be summed in base_currency
+    """
+    return Q(amount_base__isnull=True, amount__isnull=False) | ~Q(
+        base_currency=base_currency
+    )
+
+
+def sum_in_base_currency(queryset, fields, base_currency, rate_date=None):
+    """
+    Sum transaction amounts in base_currency grouped by fields, returning
+    .values()-style rows with a float "total". Uses a single SUM over the
+    stored amount_base snapshot; only when some rows have no snapshot in
+    base_currency (not yet backfilled, or a base-currency change still being
+    applied) does it fall back to historical conversion, which groups by
+    currency and rate_date (an annotation name or expression, the
+    transaction's day by default) and joins each bucket to the rate in
+    effect for it in the same query.
+    """
+    stale = stale_base_amount_q(base_currency)
+    if fields:
+        rows = list(
+            queryset.values(*fields).annotate(
+                total=Sum("amount_base"), stale=Count("pk", filter=stale)
+            )
+        )
+    else:
+        rows = [
+            queryset.aggregate(total=Sum("amount_base"), stale=Count("pk", filter=stale))
+        ]
+
+    if not any(row["stale"] for row in rows):
+        return [
+            {**{field: row[field] for field in fields}, "total": float(row["total"] or 0)}
+            for row in rows
+        ]
+
+    grouped = {}
+    for row in convert_buckets(queryset, fields, base_currency, rate_date):
+        key = tuple(row[field] for field in fields)
+        grouped[key] = grouped.get(key, 0.0) + row["total"]
+    if not fields and not grouped:
+        grouped[()] = 0.0
+    return [
+        {**dict(zip(fields, key)), "total": total} for key, total in grouped.items()
+    ]
+
+
+def convert_buckets(queryset, fields, to_currency, rate_date=None):
+    """
+    Group queryset by fields, currency and rate_date and convert each
+    bucket's SUM(amount) at the historical rate for that bucket. The rate
+    is joined with a correlated subquery, so this is a single query; buckets
+    with no history are converted at the current rate.
+    """
+    from Tracker.models import ExchangeRateHistory
+
+    if rate_date is None:
+        rate_date = TruncDate("transaction_date")
+    if isinstance(rate_date, str):
+        queryset = queryset.annotate(rate_day=TruncDate(rate_date))
+    else:
+        queryset = queryset.annotate(rate_day=rate_date)
+
+    historical_rate = (
+        ExchangeRateHistory.objects.filter(
+            base_currency=OuterRef("currency"),
+            target_currency=to_currency,
+            effective_date__lte=OuterRef("rate_day"),
+        )
+        .order_by("-effective_date")
+        .values("rate")[:1]
+    )
+    rows = list(
+        queryset.values(*fields, "currency", "rate_day").annotate(
+            total=Sum("amount"), rate=Subquery(historical_rate)
+        )
+    )
+
+    fallback = [row for row in rows if row["rate"] is None]
+    for row, converted in zip(
+        fallback, convert_many(fallback, "total", "currency", to_currency)
+    ):
+        row["total"] = converted
+    for row in rows:
+        if row["rate"] is not None:
+            row["total"] = float(row["total"] or 0) * float(row["rate"])
+    return rows
@@ -0,0 +1,435 @@
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min, Q, Sum
+from django.utils import timezone
+
+from Tracker.models import DailyUserSummary, GeneralBudget, Transaction
+from Tracker.serializers import DashboardTransactionSerializer
+
+from .cache import (
+    BUDGETS,
+    PROFILE,
+    REFRESH_LOCK_TTL,
+    TRANSACTIONS,
+    dashboard_cache_key,
+    dashboard_compute_key,
+    dashboard_refresh_key,
+    dashboard_stale_key,
+    get_user_data_versions,
+    single_flight,
+    store_dashboard_entries,
+)
+from .charts import build_series
+from .currency import get_user_base_currency
+from .utils import convert_currency, get_user_timezone
+
+PERIODS = ("1W", "1M", "3M", "1Y", "all")
+DEFAULT_PERIOD = "1M"
+
+# Sections merged into the "overview" object, then top-level ones
+OVERVIEW_SECTIONS = ("totals", "expense_distribution", "expense_chart", "budget")
+SECTIONS = (*OVERVIEW_SECTIONS, "latest_transactions")
+# Data domains each cached section is derived from; base_currency is
+# always returned alongside whatever was requested
+SECTION_DOMAINS = {
+    "base_currency": (PROFILE,),
+    "totals": (TRANSACTIONS,),
+    "expense_distribution": (TRANSACTIONS,),
+    "expense_chart": (TRANSACTIONS,),
+    "budget": (TRANSACTIONS, BUDGETS),
+    "latest_transactions": (TRANSACTIONS,),
+}
+ALL_SECTIONS = tuple(SECTION_DOMAINS)
+
+
+def normalize_period(period):
+    return period if period in PERIODS else DEFAULT_PERIOD
+
+
+def parse_sections(value):
+    """
+    Parse a comma-separated ?sections= value, every section when empty.
+    Raises ValueError naming unknown sections.
+    """
+    if not value:
+        return SECTIONS
+    requested = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(SECTIONS))
+    if unknown:
+        raise ValueError(f"Unknown dashboard sections: {', '.join(unknown)}")
+    return tuple(name for name in SECTIONS if name in requested)
+
+
+def period_start(period, today):
+    """
+    First day covered by a dashboard period, None for all time
+    """
+    return {
+        "1W": today - timedelta(days=7),
+        "1M": today - relativedelta(months=1),
+        "3M": today - relativedelta(months=3),
+        "1Y": today - relativedelta(years=1),
+        "all": None,
+    }[normalize_period(period)]
+
+
+def get_dashboard(user, period, sections=SECTIONS):
+    """
+    Return (data, stale) for the requested sections of a user's dashboard.
+
+    Each section is cached on its own, keyed by the versions of the data
+    domains it derives from, so only the missing sections are computed.
+    Missing sections are recomputed inline unless stale-while-revalidate
+    is enabled and previous values exist, in which case those are returned
+    flagged as stale and a background refresh is queued.
+
+    Inline recomputes are single-flight: concurrent misses for the same
+    sections wait for the one request computing them, and fall back to
+    the last values if it takes too long.
+    """
+    period = normalize_period(period)
+    sections = ("base_currency", *sections)
+    keys = _section_keys(user.id, period, sections)
+    values = _cached(keys)
+    missing = [section for section in sections if section not in values]
+    if not missing:
+        return assemble_dashboard(values), False
+
+    stale_keys = {
+        section: dashboard_stale_key(user.id, section, period) for section in missing
+    }
+    missing_keys = {section: keys[section] for section in missing}
+    if settings.DASHBOARD_STALE_WHILE_REVALIDATE:
+        last = _cached(stale_keys)
+        if len(last) == len(missing):
+            schedule_dashboard_refresh(user.id, period, missing)
+            return assemble_dashboard({**values, **last}), True
+
+    computed = single_flight(
+        dashboard_compute_key(user.id, period, *missing),
+        lambda: refresh_dashboard(user, period, missing, missing_keys),
+        lambda: _cached(missing_keys, complete=True),
+    )
+    if computed is not None:
+        return assemble_dashboard({**values, **computed}), False
+    last = _cached(stale_keys)
+    if len(last) == len(missing):
+        return assemble_dashboard({**values, **last}), True
+    computed = refresh_dashboard(user, period, missing, missing_keys)
+    return assemble_dashboard({**values, **computed}), False
+
+
+def refresh_dashboard(user, period, sections=ALL_SECTIONS, keys=None):
+    """
+    Compute and cache sections of a user's dashboard, returned as {section: value}
+    """
+    period = normalize_period(period)
+    if settings.DASHBOARD_BUNDLE_PERIODS:
+        computed = refresh_dashboard_bundle(user)[period]
+        return {section: computed[section] for section in sections}
+    # Resolve keys first so a write landing mid-compute orphans these entries
+    keys = keys or _section_keys(user.id, period, sections)
+    computed = build_sections(user, period, sections)
+    store_dashboard_entries(
+        user.id,
+        {(keys[section], (section, period)): computed[section] for section in sections},
+    )
+    return computed
+
+
+def refresh_dashboard_bundle(user):
+    """
+    Compute and cache every section of every period together so switching
+    between periods after the first load is served from the cache
+    """
+    versions = get_user_data_versions(user.id)
+    keys = {
+        period: _section_keys(user.id, period, ALL_SECTIONS, versions)
+        for period in PERIODS
+    }
+    bundle = build_dashboard_bundle(user)
+    store_dashboard_entries(
+        user.id,
+        {
+            (keys[period][section], (section, period)): value
+            for period, computed in bundle.items()
+            for section, value in computed.items()
+        },
+    )
+    return bundle
+
+
+def schedule_dashboard_refresh(user_id, period, sections=ALL_SECTIONS):
+    from Tracker.tasks import refresh_dashboard_cache
+
+    # One queued refresh per entry, however many stale reads arrive
+    if cache.add(
+        dashboard_refresh_key(user_id, period, *sections), 1, REFRESH_LOCK_TTL
+    ):
+        refresh_dashboard_cache.delay(user_id, period, list(sections))
+
+
+def _section_keys(user_id, period, sections, versions=None):
+    if versions is None:
+        versions = get_user_data_versions(user_id)
+    return {
+        section: dashboard_cache_key(
+            user_id,
+            section,
+            period,
+            domains=SECTION_DOMAINS[section],
+            versions=versions,
+        )
+        for section in sections
+    }
+
+
+def _cached(keys, complete=False):
+    """
+    Fetch {section: value} for the sections present in the cache; with
+    complete=True return None unless every section is present
+    """
+    found = cache.get_many(list(keys.values()))
+    values = {section: found[key] for section, key in keys.items() if key in found}
+    if complete and len(values) < len(keys):
+        return None
+    return values
+
+
+def assemble_dashboard(values):
+    """
+    Shape {section: value} into the dashboard payload, leaving out the
+    sections that were not requested
+    """
+    data = {"base_currency": values["base_currency"]}
+    if any(section in values for section in OVERVIEW_SECTIONS):
+        data["overview"] = {}
+        for section in OVERVIEW_SECTIONS:
+            data["overview"].update(values.get(section, {}))
+    if "latest_transactions" in values:
+        data["latest_transactions"] = values["latest_transactions"]
+    return data
+
+
+def build_sections(user, period, sections, today=None):
+    """
+    Compute the requested sections of a user's dashboard for one period.
+
+    Counters and totals come from one conditional aggregation over the
+    daily rollup, distribution and chart from one grouped query, and each
+    query only runs when a requested section needs it, so a cold
+    dashboard costs a fixed handful of queries regardless of how much
+    history the user has.
+    """
+    # Rollup days are in the user's timezone, so "today" has to be too
+    today = today or timezone.localdate(timezone=get_user_timezone(user))
+    period = normalize_period(period)
+    start_date = period_start(period, today)
+    summaries = DailyUserSummary.objects.filter(user=user)
+    wanted = set(sections)
+
+    needs_totals = wanted & {"totals", "expense_chart", "budget"}
+    needs_rows = wanted & {"expense_distribution", "expense_chart"}
+    return _sections(
+        period,
+        start_date,
+        today,
+        sections,
+        base_currency=(
+            get_user_base_currency(user)
+            if wanted & {"base_currency", "budget"}
+            else None
+        ),
+        totals=_period_totals(summaries, start_date, today) if needs_totals else None,
+        rows=_expense_rows(summaries, start_date) if needs_rows else None,
+        general_limit=(
+            GeneralBudget.objects.filter(user=user).first()
+            if "budget" in wanted
+            else None
+        ),
+        latest=(
+            _latest_transactions(user) if "latest_transactions" in wanted else None
+        ),
+    )
+
+
+def build_dashboard_bundle(user, today=None):
+    """
+    Compute every section of every period from a single scan of the
+    rollup, returned as {period: {section: value}}
+    """
+    today = today or timezone.localdate(timezone=get_user_timezone(user))
+    scan = [
+        (row["day"], row["type"], row["category__name"], row["total"] or 0, row["count"])
+        for row in DailyUserSummary.objects.filter(user=user)
+        .values("day", "type", "category__name")
+        .annotate(total=Sum("total_base"), count=Sum("count"))
+    ]
+    base_currency = get_user_base_currency(user)
+    general_limit = GeneralBudget.objects.filter(user=user).first()
+    latest = _latest_transactions(user)
+
+    week_ago = today - timedelta(days=7)
+    bundle = {}
+    for period in PERIODS:
+        start_date = period_start(period, today)
+        in_period = [row for row in scan if start_date is None or row[0] >= start_date]
+        totals = {
+            "income": sum(row[3] for row in in_period if row[1] == "Income"),
+            "expenses": sum(row[3] for row in in_period if row[1] != "Income"),
+            "weekly_count": sum(row[4] for row in scan if row[0] >= week_ago),
+            "total_count": sum(row[4] for row in scan),
+            "earliest": min((row[0] for row in scan), default=None),
+        }
+        rows = [
+            (day, name, float(total))
+            for day, type_, name, total, _ in in_period
+            if type_ == "Expense" and name is not None
+        ]
+        bundle[period] = _sections(
+            period,
+            start_date,
+            today,
+            ALL_SECTIONS,
+            base_currency=base_currency,
+            totals=totals,
+            rows=rows,
+            general_limit=general_limit,
+            latest=latest,
+        )
+    return bundle
+
+
+def _sections(
+    period,
+    start_date,
+    today,
+    sections,
+    base_currency=None,
+    totals=None,
+    rows=None,
+    general_limit=None,
+    latest=None,
+):
+    computed = {}
+    if totals is not None:
+        monthly_expenses = float(totals["expenses"] or 0)
+        days_in_period = (today - start_date).days if start_date else today.day
+
+    for section in sections:
+        if section == "base_currency":
+            computed[section] = base_currency
+        elif section == "totals":
+            computed[section] = {
+                "monthly_income": round(float(totals["income"] or 0), 2),
+                "monthly_expenses": round(monthly_expenses, 2),
+                "daily_average": round(monthly_expenses / max(1, days_in_period), 2),
+                "total_transactions": totals["total_count"] or 0,
+                "weekly_transactions": totals["weekly_count"] or 0,
+            }
+        elif section == "expense_distribution":
+            distribution = _distribution(rows)
+            computed[section] = {
+                "top_category": distribution[0]["name"] if distribution else None,
+                "expense_distribution": distribution,
+            }
+        elif section == "expense_chart":
+            computed[section] = {
+                "expense_chart": _expense_chart(
+                    period, start_date, rows, totals["earliest"], today
+                )
+            }
+        elif section == "budget":
+            computed[section] = {
+                "budget": _budget_summary(
+                    general_limit, base_currency, monthly_expenses
+                )
+            }
+        elif section == "latest_transactions":
+            computed[section] = latest
+    return computed
+
+
+def _period_totals(summaries, start_date, today):
+    # Every counter in one pass: FILTER clauses instead of one query each
+    in_period = Q(day__gte=start_date) if start_date else Q()
+    return summaries.aggregate(
+        income=Sum("total_base", filter=in_period & Q(type="Income")),
+        expenses=Sum("total_base", filter=in_period & ~Q(type="Income")),
+        weekly_count=Sum("count", filter=Q(day__gte=today - timedelta(days=7))),
+        total_count=Sum("count"),
+        earliest=Min("day"),
+    )
+
+
+def _expense_rows(summaries, start_date):
+    # Categorised expenses per day; distribution and chart are folded from these
+    expenses = summaries.filter(type="Expense", category__isnull=False)
+    if start_date:
+        expenses = expenses.filter(day__gte=start_date)
+    return [
+        (row["day"], row["category__name"], float(row["total"] or 0))
+        for row in expenses.values("day", "category__name").annotate(
+            total=Sum("total_base")
+        )
+    ]
+
+
+def _distribution(rows):
+    by_category = {}
+    for _, name, amount in rows:
+        by_category[name] = by_category.get(name, 0) + amount
+    return [
+        {"name": name, "amount": round(amount, 2)}
+        for name, amount in sorted(by_category.items(), key=lambda x: -x[1])
+    ]
+
+
+def _chart_axis(period, start_date, earliest, today):
+    """
+    Return (unit, first bucket start) for a period's chart
+    """
+    if period in ("1W", "1M"):
+        return "day", start_date
+    if period == "3M":
+        return "week", start_date - timedelta(days=start_date.weekday())
+    return "month", (start_date or earliest or today).replace(day=1)
+
+
+def _expense_chart(period, start_date, rows, earliest, today):
+    unit, start = _chart_axis(period, start_date, earliest, today)
+    return build_series(
+        [day for day, _, _ in rows],
+        [amount for _, _, amount in rows],
+        start,
+        today,
+        unit,
+        max_points=settings.DASHBOARD_CHART_MAX_POINTS,
+        downsample=settings.DASHBOARD_CHART_DOWNSAMPLE,
+    )
+
+
+def _budget_summary(general_limit, base_currency, spent):
+    if general_limit is None:
+        return None
+    limit = convert_currency(float(general_limit.amount), "NGN", base_currency)
+    return {
+        "plan": general_limit.period,
+        "limit": round(limit, 2),
+        "spent": round(spent, 2),
+        "remaining": round(max(limit - spent, 0), 2),
+    }
+
+
+def _latest_transactions(user):
+    latest = (
+        Transaction.objects.filter(
+            user=user, is_deleted=False, transaction_date__isnull=False
+        )
+        .select_related("user", "category", "savings")
+        .order_by("-created_at")[:5]
+    )
+    return DashboardTransactionSerializer(latest, many=True).data
@@ -0,0 +1,382 @@
+import csv
+import io
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from dateutil import parser as date_parser
+from django.db.models import Q
+from django.utils import timezone
+
+from Tracker.models import Category, Transaction
+
+from .utils import get_user_timezone
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ofx", "qif")
+BATCH_SIZE = 500
+# Only the first errors are kept on the job; the count covers all of them
+MAX_STORED_ERRORS = 100
+
+# Canonical field -> accepted CSV headers (case-insensitive)
+CSV_HEADERS = {
+    "date": ("date", "transaction_date", "transaction date", "posted", "posting date"),
+    "amount": ("amount", "value"),
+    "debit": ("debit", "withdrawal", "money out"),
+    "credit": ("credit", "deposit", "money in"),
+    "type": ("type",),
+    "party_name": ("party_name", "payee", "description", "name", "merchant"),
+    "notes": ("notes", "memo", "narration", "reference"),
+    "category": ("category",),
+    "currency": ("currency",),
+}
+OFX_FIELDS = {
+    "DTPOSTED": "date",
+    "TRNAMT": "amount",
+    "NAME": "party_name",
+    "PAYEE": "party_name",
+    "MEMO": "notes",
+}
+QIF_FIELDS = {
+    "D": "date",
+    "T": "amount",
+    "U": "amount",
+    "P": "party_name",
+    "M": "notes",
+    "L": "category",
+}
+OFX_TAG = re.compile(r"<([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+def detect_format(filename, declared=None):
+    """
+    Return the import format declared by the client or implied by the file
+    extension, or None when it is not a supported one
+    """
+    name = (declared or filename.rsplit(".", 1)[-1]).lower()
+    return name if name in FORMATS else None
+
+
+# ── Parsers: text lines -> (line number, raw record) ──
+
+
+def parse_csv(lines):
+    """
+    Yield (line number, record) for every CSV row, with recognised headers
+    mapped to canonical field names
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    aliases = {
+        alias: field for field, names in CSV_HEADERS.items() for alias in names
+    }
+    columns = [aliases.get(name.strip().lower()) for name in header]
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, {
+            field: value.strip()
+            for field, value in zip(columns, row)
+            if field is not None
+        }
+
+
+def parse_ofx(lines):
+    """
+    Yield (line number, record) for every <STMTTRN> of an OFX statement,
+    SGML (OFX 1.x) or XML (OFX 2.x)
+    """
+    currency = None
+    record = None
+    for number, line in enumerate(lines, start=1):
+        for tag, value in OFX_TAG.findall(line):
+            tag, value = tag.upper(), value.strip()
+            if tag == "CURDEF":
+                currency = value
+            elif tag == "STMTTRN":
+                record, start = {}, number
+            elif record is not None and tag in OFX_FIELDS:
+                record.setdefault(OFX_FIELDS[tag], value)
+        if record is not None and "</STMTTRN>" in line.upper():
+            if currency:
+                record["currency"] = currency
+            yield start, record
+            record = None
+
+
+def parse_qif(lines):
+    """
+    Yield (line number, record) for every QIF record, which ends with ^
+    """
+    record, start = {}, None
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("!"):
+            continue
+        if line == "^":
+            if record:
+                yield start, record
+            record, start = {}, None
+            continue
+        field = QIF_FIELDS.get(line[0])
+        if field is not None:
+            start = start or number
+            record.setdefault(field, line[1:].strip())
+    if record:
+        yield start, record
+
+
+PARSERS = {"csv": parse_csv, "ofx": parse_ofx, "qif": parse_qif}
+
+
+# ── Normalization ──
+
+
+def parse_amount(value):
+    """
+    Parse a statement amount such as "1,234.50", "-20", "(20.00)" or
+    "₦5,000" into a Decimal
+    """
+    value = (value or "").strip()
+    negative = value.startswith("(") and value.endswith(")")
+    cleaned = re.sub(r"[^\d.\-+]", "", value)
+    if not cleaned:
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}") from None
+    return -amount if negative else amount
+
+
+def parse_date(value, tz, dayfirst=False):
+    """
+    Parse a statement date (OFX YYYYMMDD[HHMMSS], QIF M/D'YY or any common
+    CSV layout) into an aware datetime; dates without a time fall at the
+    start of that day in the user's timezone
+    """
+    value = (value or "").strip()
+    if not value:
+        raise ValueError("Missing date")
+    try:
+        if re.match(r"^\d{8}", value):
+            digits = re.match(r"^\d+", value).group()[:14]
+            parsed = datetime.strptime(digits, "%Y%m%d%H%M%S"[: len(digits) - 2])
+        else:
+            parsed = date_parser.parse(value.replace("'", "/"), dayfirst=dayfirst)
+    except (ValueError, OverflowError):
+        raise ValueError(f"Invalid date: {value!r}") from None
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=tz)
+    return parsed
+
+
+def normalize(records, tz, dayfirst=False):
+    """
+    Turn raw records into transaction rows, yielding (line number, row,
+    error) with exactly one of row and error set. Negative amounts (or a
+    debit column) are expenses unless the record names its type.
+    """
+    for number, record in records:
+        try:
+            if record.get("amount"):
+                amount = parse_amount(record["amount"])
+            elif record.get("debit") or record.get("credit"):
+                amount = parse_amount(record.get("credit") or "0") - parse_amount(
+                    record.get("debit") or "0"
+                )
+            else:
+                raise ValueError("Missing amount")
+            if not amount:
+                raise ValueError("Amount is zero")
+
+            declared = (record.get("type") or "").strip().capitalize()
+            if declared in ("Expense", "Income"):
+                type_ = declared
+            else:
+                type_ = "Expense" if amount < 0 else "Income"
+
+            row = {
+                "transaction_date": parse_date(record.get("date"), tz, dayfirst),
+                "amount": abs(amount),
+                "type": type_,
+                "party_name": (record.get("party_name") or "")[:200] or None,
+                "notes": (record.get("notes") or "")[:500] or None,
+                "category_name": (record.get("category") or "").strip(),
+            }
+            if record.get("currency"):
+                row["currency"] = record["currency"].strip().upper()
+            yield number, row, None
+        except ValueError as exc:
+            yield number, None, str(exc)
+
+
+# ── Category mapping, batching and dedupe ──
+
+
+def load_category_map(user):
+    """
+    Return {(lowercase name or tag, type): category id} for the categories
+    a user can use, loaded in one query; the user's own win over system ones
+    """
+    categories = Category.objects.filter(
+        Q(user=user) | Q(user__isnull=True, is_system=True)
+    ).values_list("id", "name", "tag", "type", "user_id")
+    mapping = {}
+    # System categories first so the user's own overwrite them
+    for category_id, name, tag, type_, owner in sorted(
+        categories, key=lambda category: category[4] is not None
+    ):
+        for key in {(name or "").lower(), (tag or "").lower()} - {""}:
+            mapping[(key, type_)] = category_id
+            mapping[(key, None)] = category_id
+    return mapping
+
+
+def map_categories(rows, categories):
+    """
+    Resolve each row's category name against a preloaded category map,
+    preferring a category of the row's type; unknown names are left blank
+    """
+    for number, row, error in rows:
+        if row is not None:
+            name = row.pop("category_name").lower()
+            if name:
+                row["category"] = categories.get(
+                    (name, row["type"]), categories.get((name, None))
+                )
+        yield number, row, error
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def dedupe_key(transaction_date, amount, party_name, tz):
+    return (
+        timezone.localdate(transaction_date, tz),
+        Decimal(amount).quantize(Decimal("0.01")),
+        (party_name or "").strip().lower(),
+    )
+
+
+def drop_existing(user, rows, before, tz):
+    """
+    Split a batch of (line number, row) into fresh rows and duplicates of
+    transactions the user already had before the import started, matched
+    on (day, amount, party name) with one query. Each existing transaction
+    absorbs at most one imported row, so genuine repeats within a statement
+    are kept.
+    """
+    if not rows:
+        return [], 0
+    dates = [row["transaction_date"] for _, row in rows]
+    existing = Counter(
+        dedupe_key(*values, tz)
+        for values in Transaction.objects.filter(
+            user=user,
+            is_deleted=False,
+            created_at__lt=before,
+            transaction_date__gte=min(dates) - timedelta(days=1),
+            transaction_date__lt=max(dates) + timedelta(days=1),
+            amount__in={row["amount"] for _, row in rows},
+        ).values_list("transaction_date", "amount", "party_name")
+    )
+    fresh = []
+    duplicates = 0
+    for number, row in rows:
+        key = dedupe_key(row["transaction_date"], row["amount"], row["party_name"], tz)
+        if existing[key]:
+            existing[key] -= 1
+            duplicates += 1
+        else:
+            fresh.append((number, row))
+    return fresh, duplicates
+
+
+# ── Pipeline ──
+
+
+def import_rows(job, lines, batch_size=BATCH_SIZE):
+    """
+    Stream text lines of a statement through parse -> normalize -> map
+    categories -> dedupe -> batched bulk insert, recording progress on the
+    job after every batch. Only one batch is held in memory at a time.
+    """
+    from Tracker.services import TransactionService
+
+    user = job.user
+    tz = get_user_timezone(user)
+    rows = map_categories(
+        normalize(PARSERS[job.format](lines), tz, job.dayfirst),
+        load_category_map(user),
+    )
+    for batch in batched(rows, batch_size):
+        errors = [
+            {"line": number, "errors": error} for number, row, error in batch if error
+        ]
+        fresh, duplicates = drop_existing(
+            user,
+            [(number, row) for number, row, error in batch if row is not None],
+            job.created_at,
+            tz,
+        )
+        created, row_errors, _ = TransactionService.bulk_create_transactions(
+            user, [row for _, row in fresh]
+        )
+        errors += [
+            {"line": fresh[error["index"]][0], "errors": error["errors"]}
+            for error in row_errors
+        ]
+
+        job.processed_rows += len(batch)
+        job.created_count += len(created)
+        job.duplicate_count += duplicates
+        job.error_count += len(errors)
+        job.errors += errors[: MAX_STORED_ERRORS - len(job.errors)]
+        job.save(
+            update_fields=[
+                "processed_rows",
+                "created_count",
+                "duplicate_count",
+                "error_count",
+                "errors",
+            ]
+        )
+    return job
+
+
+def run_import(job, batch_size=BATCH_SIZE):
+    """
+    Run an import job over its stored file, marking it Completed or Failed,
+    then delete the file
+    """
+    job.status = "Running"
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at"])
+    try:
+        with job.file.open("rb") as raw:
+            lines = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+            import_rows(job, lines, batch_size)
+        job.status = "Completed"
+    except UnicodeDecodeError:
+        job.status = "Failed"
+        job.message = "File is not valid UTF-8 text"
+    except Exception:
+        logger.exception("Import job %s failed", job.id)
+        job.status = "Failed"
+        job.message = "Import failed; rows before the failure were kept"
+    job.finished_at = timezone.now()
+    # Statements hold sensitive financial data; keep them only while importing
+    job.file.delete(save=False)
+    job.save(update_fields=["status", "message", "finished_at", "file"])
+    return job
+
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from Tracker.services import TransactionService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Fill in the base-currency amount snapshot on existing transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every transaction instead of only missing or stale ones",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = 0
+        for user in User.objects.select_related("profile").iterator():
+            total += TransactionService.rebase_transactions(
+                user,
+                only_stale=not options["all"],
+                batch_size=options["batch_size"],
+            )
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {total} transactions"))
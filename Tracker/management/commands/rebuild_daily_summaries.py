@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from Tracker.services import DailySummaryService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user daily transaction rollup used by the dashboard"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, help="Only rebuild the rollup of this user id"
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options["user"]:
+            users = users.filter(id=options["user"])
+
+        total = 0
+        for user in users.iterator():
+            total += DailySummaryService.rebuild(user)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} daily summary rows"))
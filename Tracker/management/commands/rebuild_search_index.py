@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from Tracker.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Repopulate the full-text index behind transaction search"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", default="default", help="Database alias to rebuild"
+        )
+
+    def handle(self, *args, **options):
+        backend = rebuild_search_index(options["database"])
+        if backend is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "No search index on this database; search uses substring matches"
+                )
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the {backend} search index"))
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:20
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Round
+
+PIVOT_CURRENCY = "USD"
+DEFAULT_BASE_CURRENCY = "NGN"
+
+
+def load_rates(CurrencyExchangeRate):
+    # Same matrix as Tracker.currency.load_rate_matrix: stored pairs, their
+    # inverses, then cross pairs triangulated through the pivot currency
+    rates = {
+        (base, target): float(rate)
+        for base, target, rate in CurrencyExchangeRate.objects.values_list(
+            "base_currency", "target_currency", "rate"
+        )
+        if rate
+    }
+    for (base, target), rate in list(rates.items()):
+        rates.setdefault((target, base), 1.0 / rate)
+    quotes = {
+        target: rate for (base, target), rate in rates.items() if base == PIVOT_CURRENCY
+    }
+    quotes[PIVOT_CURRENCY] = 1.0
+    for base in quotes:
+        for target in quotes:
+            if base != target:
+                rates.setdefault((base, target), quotes[target] / quotes[base])
+    return rates
+
+
+def backfill_amount_base(apps, schema_editor):
+    # Snapshot existing rows at today's rates so the rollup built from
+    # amount_base in 0014 sums every currency in the user's base currency
+    Transaction = apps.get_model("Tracker", "Transaction")
+    CurrencyExchangeRate = apps.get_model("Tracker", "CurrencyExchangeRate")
+    UserProfile = apps.get_model("Account", "UserProfile")
+
+    rates = load_rates(CurrencyExchangeRate)
+    profiles = dict(UserProfile.objects.values_list("user_id", "base_currency"))
+    bases = {}
+    for user_id in Transaction.objects.values_list("user_id", flat=True).distinct():
+        base = profiles.get(user_id) or DEFAULT_BASE_CURRENCY
+        bases.setdefault(base, []).append(user_id)
+
+    for base, user_ids in bases.items():
+        for start in range(0, len(user_ids), 500):
+            pending = Transaction.objects.filter(
+                user_id__in=user_ids[start : start + 500], amount__isnull=False
+            )
+            for currency in pending.values_list("currency", flat=True).distinct():
+                rate = 1.0 if currency == base else rates.get((currency, base))
+                if rate is None:
+                    # No known rate: left for backfill_amount_base once rates exist
+                    continue
+                rate = Decimal(repr(rate)).quantize(Decimal("0.00000001"))
+                pending.filter(currency=currency).update(
+                    amount_base=Round(F("amount") * Value(rate), 2),
+                    exchange_rate=rate,
+                    base_currency=base,
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Account', '0010_userprofile_age_userprofile_bio_and_more'),
+        ('Tracker', '0011_model_rename'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='amount_base',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='base_currency',
+            field=models.CharField(blank=True, choices=[('NGN', 'Naira (NGN)'), ('USD', 'US Dollar (USD)'), ('EUR', 'Euro (EUR)'), ('GBP', 'British Pound (GBP)'), ('CAD', 'Canadian Dollar (CAD)'), ('AUD', 'Australian Dollar (AUD)'), ('JPY', 'Japanese Yen (JPY)'), ('KES', 'Kenyan Shilling (KES)'), ('ZAR', 'South African Rand (ZAR)'), ('GHS', 'Ghanaian Cedi (GHS)')], max_length=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='exchange_rate',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=18, null=True),
+        ),
+        migrations.RunPython(backfill_amount_base, migrations.RunPython.noop),
+    ]
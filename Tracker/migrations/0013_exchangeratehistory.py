@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0012_transaction_amount_base'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base_currency', models.CharField(choices=[('NGN', 'Naira (NGN)'), ('USD', 'US Dollar (USD)'), ('EUR', 'Euro (EUR)'), ('GBP', 'British Pound (GBP)'), ('CAD', 'Canadian Dollar (CAD)'), ('AUD', 'Australian Dollar (AUD)'), ('JPY', 'Japanese Yen (JPY)'), ('KES', 'Kenyan Shilling (KES)'), ('ZAR', 'South African Rand (ZAR)'), ('GHS', 'Ghanaian Cedi (GHS)')], max_length=3)),
+                ('target_currency', models.CharField(choices=[('NGN', 'Naira (NGN)'), ('USD', 'US Dollar (USD)'), ('EUR', 'Euro (EUR)'), ('GBP', 'British Pound (GBP)'), ('CAD', 'Canadian Dollar (CAD)'), ('AUD', 'Australian Dollar (AUD)'), ('JPY', 'Japanese Yen (JPY)'), ('KES', 'Kenyan Shilling (KES)'), ('ZAR', 'South African Rand (ZAR)'), ('GHS', 'Ghanaian Cedi (GHS)')], max_length=3)),
+                ('effective_date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('base_currency', 'target_currency', 'effective_date'), name='unique_exchange_rate_per_day')],
+            },
+        ),
+    ]
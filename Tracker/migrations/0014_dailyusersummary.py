@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_daily_summaries(apps, schema_editor):
+    Transaction = apps.get_model("Tracker", "Transaction")
+    DailyUserSummary = apps.get_model("Tracker", "DailyUserSummary")
+
+    rows = (
+        Transaction.objects.filter(is_deleted=False, transaction_date__isnull=False)
+        .annotate(day=TruncDate("transaction_date"))
+        .values("user_id", "day", "type", "category_id", "currency")
+        .annotate(
+            total=Sum("amount"),
+            total_base=Sum("amount_base"),
+            raw_unconverted=Sum("amount", filter=Q(amount_base__isnull=True)),
+            count=Count("id"),
+        )
+    )
+    DailyUserSummary.objects.bulk_create(
+        (
+            DailyUserSummary(
+                user_id=row["user_id"],
+                day=row["day"],
+                type=row["type"],
+                category_id=row["category_id"],
+                currency=row["currency"],
+                total=row["total"] or 0,
+                total_base=(row["total_base"] or 0) + (row["raw_unconverted"] or 0),
+                count=row["count"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0013_exchangeratehistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUserSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('type', models.CharField(blank=True, choices=[('Expense', 'Expense'), ('Income', 'Income')], max_length=50, null=True)),
+                ('currency', models.CharField(choices=[('NGN', 'Naira (NGN)'), ('USD', 'US Dollar (USD)'), ('EUR', 'Euro (EUR)'), ('GBP', 'British Pound (GBP)'), ('CAD', 'Canadian Dollar (CAD)'), ('AUD', 'Australian Dollar (AUD)'), ('JPY', 'Japanese Yen (JPY)'), ('KES', 'Kenyan Shilling (KES)'), ('ZAR', 'South African Rand (ZAR)'), ('GHS', 'Ghanaian Cedi (GHS)')], max_length=3)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_base', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='Tracker.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'day', 'type', 'category', 'currency'], name='daily_summary_key_idx')],
+            },
+        ),
+        migrations.RunPython(build_daily_summaries, migrations.RunPython.noop),
+    ]
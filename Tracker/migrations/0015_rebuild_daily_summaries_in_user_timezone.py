@@ -0,0 +1,63 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def rebuild_in_user_timezone(apps, schema_editor):
+    # 0014 bucketed every user's days in UTC; redo the ones that live elsewhere
+    Transaction = apps.get_model("Tracker", "Transaction")
+    DailyUserSummary = apps.get_model("Tracker", "DailyUserSummary")
+    UserProfile = apps.get_model("Account", "UserProfile")
+
+    profiles = UserProfile.objects.exclude(timezone="UTC").values_list(
+        "user_id", "timezone"
+    )
+    for user_id, tz_name in profiles.iterator():
+        try:
+            tz = ZoneInfo(tz_name)
+        except ZoneInfoNotFoundError:
+            continue
+        rows = (
+            Transaction.objects.filter(
+                user_id=user_id, is_deleted=False, transaction_date__isnull=False
+            )
+            .annotate(day=TruncDate("transaction_date", tzinfo=tz))
+            .values("day", "type", "category_id", "currency")
+            .annotate(
+                total=Sum("amount"),
+                total_base=Sum("amount_base"),
+                raw_unconverted=Sum("amount", filter=Q(amount_base__isnull=True)),
+                count=Count("id"),
+            )
+        )
+        DailyUserSummary.objects.filter(user_id=user_id).delete()
+        DailyUserSummary.objects.bulk_create(
+            (
+                DailyUserSummary(
+                    user_id=user_id,
+                    day=row["day"],
+                    type=row["type"],
+                    category_id=row["category_id"],
+                    currency=row["currency"],
+                    total=row["total"] or 0,
+                    total_base=(row["total_base"] or 0) + (row["raw_unconverted"] or 0),
+                    count=row["count"],
+                )
+                for row in rows
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Account", "0010_userprofile_age_userprofile_bio_and_more"),
+        ("Tracker", "0014_dailyusersummary"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_in_user_timezone, migrations.RunPython.noop),
+    ]
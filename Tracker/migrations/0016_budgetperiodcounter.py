@@ -0,0 +1,90 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:41
+
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import django.db.models.deletion
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+PERIODS = {
+    "Daily": relativedelta(days=1),
+    "Weekly": relativedelta(weeks=1),
+    "Monthly": relativedelta(months=1),
+    "Yearly": relativedelta(years=1),
+}
+
+
+def period_start(period, day):
+    if period == "Daily":
+        return day
+    if period == "Weekly":
+        return day - timedelta(days=(day.weekday() + 1) % 7)
+    if period == "Monthly":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def seed_current_counters(apps, schema_editor):
+    # Counters are only kept up to date from now on; seed the current
+    # periods from the daily rollup so the first limit checks are right
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    DailyUserSummary = apps.get_model("Tracker", "DailyUserSummary")
+    BudgetPeriodCounter = apps.get_model("Tracker", "BudgetPeriodCounter")
+
+    counters = []
+    for user_id, tz_name in User.objects.values_list(
+        "id", "profile__timezone"
+    ).iterator():
+        try:
+            tz = ZoneInfo(tz_name or "UTC")
+        except (ZoneInfoNotFoundError, ValueError):
+            tz = ZoneInfo("UTC")
+        today = timezone.localdate(timezone=tz)
+        for period, step in PERIODS.items():
+            start = period_start(period, today)
+            spent = DailyUserSummary.objects.filter(
+                user_id=user_id,
+                type="Expense",
+                day__gte=start,
+                day__lt=start + step,
+            ).aggregate(total=Sum("total_base"))["total"]
+            if spent:
+                counters.append(
+                    BudgetPeriodCounter(
+                        user_id=user_id,
+                        period=period,
+                        period_start=start,
+                        spent=spent,
+                    )
+                )
+    BudgetPeriodCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0015_rebuild_daily_summaries_in_user_timezone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetPeriodCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('Daily', 'Daily'), ('Weekly', 'Weekly'), ('Monthly', 'Monthly'), ('Yearly', 'Yearly')], max_length=100)),
+                ('period_start', models.DateField()),
+                ('spent', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'period_start'), name='unique_budget_period_counter')],
+            },
+        ),
+        migrations.RunPython(seed_current_counters, migrations.RunPython.noop),
+    ]
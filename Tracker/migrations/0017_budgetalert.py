@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0016_budgetperiodcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('budget_type', models.CharField(choices=[('General', 'General'), ('Category', 'Category')], max_length=20)),
+                ('budget_id', models.PositiveIntegerField()),
+                ('name', models.CharField(max_length=100)),
+                ('period', models.CharField(choices=[('Daily', 'Daily'), ('Weekly', 'Weekly'), ('Monthly', 'Monthly'), ('Yearly', 'Yearly')], max_length=100)),
+                ('period_start', models.DateField()),
+                ('threshold', models.PositiveSmallIntegerField()),
+                ('spent', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'notified_at'], name='Tracker_bud_user_id_6b3826_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'budget_type', 'budget_id', 'period_start', 'threshold'), name='unique_budget_alert_per_period')],
+            },
+        ),
+    ]
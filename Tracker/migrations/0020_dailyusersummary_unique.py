@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:26
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_summaries(apps, schema_editor):
+    # Concurrent first writes of a day could each insert a row for the same key
+    DailyUserSummary = apps.get_model("Tracker", "DailyUserSummary")
+    duplicates = (
+        DailyUserSummary.objects.values("user_id", "day", "type", "category_id", "currency")
+        .annotate(
+            keep=Min("id"),
+            rows=Count("id"),
+            sum_total=Sum("total"),
+            sum_total_base=Sum("total_base"),
+            sum_count=Sum("count"),
+        )
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        key = {
+            "user_id": row["user_id"],
+            "day": row["day"],
+            "type": row["type"],
+            "category_id": row["category_id"],
+            "currency": row["currency"],
+        }
+        DailyUserSummary.objects.filter(**key).exclude(id=row["keep"]).delete()
+        DailyUserSummary.objects.filter(id=row["keep"]).update(
+            total=row["sum_total"],
+            total_base=row["sum_total_base"],
+            count=row["sum_count"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0019_importjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_summaries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyusersummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('user', 'day', 'type', 'category', 'currency'), name='unique_daily_summary'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyusersummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'day', 'type', 'currency'), name='unique_daily_summary_uncategorized'),
+        ),
+    ]
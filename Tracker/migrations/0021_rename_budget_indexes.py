@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0020_dailyusersummary_unique'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='categorybudget',
+            new_name='Tracker_cat_user_id_f7a36b_idx',
+            old_name='Tracker_cat_user_id_49deca_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='categorybudget',
+            new_name='Tracker_cat_user_id_ffd16c_idx',
+            old_name='Tracker_cat_user_id_bbd8cf_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='generalbudget',
+            new_name='Tracker_gen_user_id_ca4f8d_idx',
+            old_name='Tracker_gen_user_id_4fb8d7_idx',
+        ),
+    ]
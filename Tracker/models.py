@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 from django.utils import timezone
 
 from Account.models import CURRENCIES
@@ -32,6 +34,21 @@ Priority = (
     ("Medium", "Medium"),
     ("High", "High"),
 )
+Budget_Type = (
+    ("General", "General"),
+    ("Category", "Category"),
+)
+Import_Format = (
+    ("csv", "CSV"),
+    ("ofx", "OFX"),
+    ("qif", "QIF"),
+)
+Import_Status = (
+    ("Pending", "Pending"),
+    ("Running", "Running"),
+    ("Completed", "Completed"),
+    ("Failed", "Failed"),
+)
 
 
 class Category(models.Model):
@@ -142,10 +159,115 @@ class Transaction(models.Model):
     recurring = models.BooleanField(default=False)
     is_deleted = models.BooleanField(default=False)
     currency = models.CharField(max_length=3, choices=CURRENCIES, default="NGN")
+    # Snapshot of the amount in the owner's base currency, written on save
+    amount_base = models.DecimalField(
+        max_digits=14, decimal_places=2, null=True, blank=True
+    )
+    base_currency = models.CharField(
+        max_length=3, choices=CURRENCIES, null=True, blank=True
+    )
+    exchange_rate = models.DecimalField(
+        max_digits=18, decimal_places=8, null=True, blank=True
+    )
+
+    BASE_AMOUNT_FIELDS = ("amount_base", "base_currency", "exchange_rate")
+    # Fields that decide how a transaction contributes to DailyUserSummary
+    ROLLUP_FIELDS = (
+        "user_id",
+        "transaction_date",
+        "type",
+        "category_id",
+        "currency",
+        "amount",
+        "amount_base",
+        "is_deleted",
+    )
 
     def __str__(self):
         return f"{self.user.username} - {self.type} - {self.party_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.ROLLUP_FIELDS) <= set(field_names):
+            instance._rollup_snapshot = instance._rollup_row()
+        return instance
+
+    def save(self, *args, **kwargs):
+        from Tracker.services import DailySummaryService
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.apply_base_amount()
+        elif {"amount", "currency", "transaction_date"} & set(update_fields):
+            self.apply_base_amount()
+            kwargs["update_fields"] = {*update_fields, *self.BASE_AMOUNT_FIELDS}
+
+        rollup_changed = update_fields is None or bool(
+            {field.removesuffix("_id") for field in self.ROLLUP_FIELDS}
+            & {field.removesuffix("_id") for field in kwargs["update_fields"]}
+        )
+        with transaction.atomic():
+            previous = self._previous_rollup_contribution() if rollup_changed else None
+            super().save(*args, **kwargs)
+            if rollup_changed:
+                current = self.rollup_contribution()
+                if previous != current:
+                    DailySummaryService.apply(
+                        removed=[previous] if previous else [],
+                        added=[current] if current else [],
+                    )
+                self._rollup_snapshot = self._rollup_row()
+
+    def delete(self, *args, **kwargs):
+        from Tracker.services import DailySummaryService
+
+        with transaction.atomic():
+            previous = self._previous_rollup_contribution()
+            result = super().delete(*args, **kwargs)
+            if previous:
+                DailySummaryService.apply(removed=[previous])
+        return result
+
+    def rollup_contribution(self):
+        from Tracker.services import DailySummaryService
+        from Tracker.utils import get_user_timezone
+
+        return DailySummaryService.contribution(
+            self._rollup_row(), get_user_timezone(self.user)
+        )
+
+    def _rollup_row(self):
+        return {field: getattr(self, field) for field in self.ROLLUP_FIELDS}
+
+    def _previous_rollup_contribution(self):
+        from Tracker.services import DailySummaryService
+        from Tracker.utils import get_user_timezone
+
+        if self._state.adding or self.pk is None:
+            return None
+        # Raw fields only: resolving the owner's timezone on every load would
+        # cost a query per row
+        row = getattr(self, "_rollup_snapshot", None)
+        if row is None:
+            row = type(self).objects.filter(pk=self.pk).values(*self.ROLLUP_FIELDS).first()
+        return (
+            DailySummaryService.contribution(row, get_user_timezone(self.user))
+            if row
+            else None
+        )
+
+    def apply_base_amount(self, base_currency=None):
+        from Tracker.currency import get_user_base_currency, to_base_amount
+
+        if base_currency is None:
+            base_currency = get_user_base_currency(self.user)
+        on = timezone.localdate(self.transaction_date) if self.transaction_date else None
+        self.amount_base, self.exchange_rate = to_base_amount(
+            self.amount, self.currency, base_currency, on=on
+        )
+        self.base_currency = base_currency
+
     class Meta:
         indexes = [
             models.Index(fields=["user", "transaction_date"]),
@@ -192,3 +314,144 @@ class CurrencyExchangeRate(models.Model):
 
     def __str__(self):
         return f"{self.base_currency} → {self.target_currency}: {self.rate}"
+
+
+class ExchangeRateHistory(models.Model):
+    base_currency = models.CharField(max_length=3, choices=CURRENCIES)
+    target_currency = models.CharField(max_length=3, choices=CURRENCIES)
+    effective_date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        # The unique index doubles as the "latest rate on or before a date"
+        # lookup path: equality on the pair, range scan on effective_date.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["base_currency", "target_currency", "effective_date"],
+                name="unique_exchange_rate_per_day",
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.base_currency} → {self.target_currency} "
+            f"on {self.effective_date}: {self.rate}"
+        )
+
+
+class DailyUserSummary(models.Model):
+    # Incrementally maintained rollup of a user's live transactions per day
+    user = models.ForeignKey(user, on_delete=models.CASCADE)
+    day = models.DateField()
+    type = models.CharField(choices=Type, max_length=50, null=True, blank=True)
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, null=True, blank=True
+    )
+    currency = models.CharField(max_length=3, choices=CURRENCIES)
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_base = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.day} - {self.type} - {self.currency}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "day", "type", "category", "currency"],
+                name="daily_summary_key_idx",
+            )
+        ]
+        # NULLs never collide in a unique index, so uncategorized rows get their own
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "day", "type", "category", "currency"],
+                condition=models.Q(category__isnull=False),
+                name="unique_daily_summary",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "day", "type", "currency"],
+                condition=models.Q(category__isnull=True),
+                name="unique_daily_summary_uncategorized",
+            ),
+        ]
+
+
+class BudgetPeriodCounter(models.Model):
+    # Running expense total of a user for one budget period, kept on write
+    user = models.ForeignKey(user, on_delete=models.CASCADE)
+    period = models.CharField(choices=Plan, max_length=100)
+    period_start = models.DateField()
+    spent = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.period} from {self.period_start}: {self.spent}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "period", "period_start"],
+                name="unique_budget_period_counter",
+            )
+        ]
+
+
+class BudgetAlert(models.Model):
+    # A budget crossing one of its alert thresholds, recorded once per period
+    user = models.ForeignKey(user, on_delete=models.CASCADE)
+    budget_type = models.CharField(choices=Budget_Type, max_length=20)
+    budget_id = models.PositiveIntegerField()
+    name = models.CharField(max_length=100)
+    period = models.CharField(choices=Plan, max_length=100)
+    period_start = models.DateField()
+    threshold = models.PositiveSmallIntegerField()
+    spent = models.DecimalField(max_digits=16, decimal_places=2)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} reached {self.threshold}% of its {self.period} budget"
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "notified_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "budget_type", "budget_id", "period_start", "threshold"],
+                name="unique_budget_alert_per_period",
+            )
+        ]
+
+
+class ImportJob(models.Model):
+    # An uploaded statement file and the progress of importing it
+    user = models.ForeignKey(user, on_delete=models.CASCADE)
+    file = models.FileField(upload_to="imports/")
+    format = models.CharField(choices=Import_Format, max_length=10)
+    status = models.CharField(choices=Import_Status, max_length=20, default="Pending")
+    dayfirst = models.BooleanField(default=False)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.format} import ({self.status})"
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "created_at"])]
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=SavingPlan)
+def remove_cascaded_transactions_from_rollup(sender, instance, **kwargs):
+    from Tracker.services import DailySummaryService
+
+    field = "category" if sender is Category else "savings"
+    DailySummaryService.remove_cascaded(Transaction.objects.filter(**{field: instance}))
@@ -0,0 +1,193 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to keyset (cursor) pagination when
+    a request carries ?cursor= or ?pagination=cursor.
+
+    Cursor pages seek on (ordering field, id) from the last row seen rather
+    than counting the queryset and skipping an OFFSET, so a page deep in a
+    long history costs the same as the first one. The ordering field is
+    the first of the view's active ordering.
+    """
+
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == "cursor"
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = self.get_keyset_ordering(request, queryset, view)
+        self.field = self.ordering.lstrip("-")
+        descending = self.ordering.startswith("-")
+        page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request, queryset)
+        # Walking backwards is the forward query with the ordering flipped
+        queryset = queryset.order_by(*self.order_by(descending != reverse))
+        segments = [Q()] if position is None else self.seek(position, descending, reverse)
+
+        rows = []
+        for segment in segments:
+            rows.extend(queryset.filter(segment)[: page_size + 1 - len(rows)])
+            if len(rows) > page_size:
+                break
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows:
+            first, last = self.position(rows[0]), self.position(rows[-1])
+            if reverse:
+                self.next_position = last
+                self.previous_position = first if has_more else None
+            else:
+                self.next_position = last if has_more else None
+                self.previous_position = first if position is not None else None
+        return rows
+
+    def get_keyset_ordering(self, request, queryset, view):
+        # Use the view's own ordering backend so its field checks apply here too
+        backend = next(
+            (
+                backend
+                for backend in getattr(view, "filter_backends", [])
+                if issubclass(backend, OrderingFilter)
+            ),
+            OrderingFilter,
+        )
+        ordering = backend().get_ordering(request, queryset, view) or []
+        for term in ordering:
+            if term.lstrip("-") not in ("id", "pk"):
+                return term
+        return "-id"
+
+    def order_by(self, descending):
+        # Plain (field, id) ordering, so the (user, field) index can serve it
+        sign = "-" if descending else ""
+        if self.field == "id":
+            return [f"{sign}id"]
+        return [f"{sign}{self.field}", f"{sign}id"]
+
+    def seek(self, position, descending, reverse):
+        """
+        Return the filters selecting the rows after (value, pk) in the page
+        order, or before it when reversing, as segments to read in turn.
+        Non-NULL values are one index range; NULLs sort where the database
+        puts them and are read as a separate segment so the range stays
+        sargable.
+        """
+        value, pk = position
+        lookup = "lt" if descending != reverse else "gt"
+        if self.field == "id":
+            return [Q(**{f"id__{lookup}": pk})]
+        towards_nulls = (lookup == "gt") == connection.features.nulls_order_largest
+        isnull = f"{self.field}__isnull"
+        if value is None:
+            tail = Q(**{isnull: True, f"id__{lookup}": pk})
+            return [tail] if towards_nulls else [tail, Q(**{isnull: False})]
+        seek = Q(**{f"{self.field}__{lookup}e": value}) & (
+            Q(**{f"{self.field}__{lookup}": value}) | Q(**{f"id__{lookup}": pk})
+        )
+        return [seek, Q(**{isnull: True})] if towards_nulls else [seek]
+
+    def position(self, instance):
+        value = getattr(instance, self.field)
+        return (None if value is None else str(value), instance.pk)
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {"o": self.ordering, "p": position}
+        if reverse:
+            payload["r"] = 1
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        ).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, queryset):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            value, pk = payload["p"]
+            if payload["o"] != self.ordering:
+                raise ValueError("cursor was issued for another ordering")
+            if value is not None:
+                # The ordering field is a model field or an annotation, e.g. a search rank
+                field = queryset.query.annotations.get(self.field)
+                field = (
+                    field.output_field
+                    if field is not None
+                    else queryset.model._meta.get_field(self.field)
+                )
+                value = field.to_python(value)
+            return (value, int(pk)), bool(payload.get("r"))
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            FieldDoesNotExist,
+            ValidationError,
+        ) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.next_position
+                and self.encode_cursor(self.next_position),
+                "previous": self.previous_position
+                and self.encode_cursor(self.previous_position, reverse=True),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        # count is only present in page-number mode
+        schema["required"] = ["results"]
+        return schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque cursor from a previous next/previous link.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' to start cursor pagination.",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            },
+        ]
@@ -0,0 +1,137 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+from Tracker.models import Transaction
+
+# Created by migration 0018: an FTS5 table on SQLite, a generated tsvector
+# column with a GIN index on PostgreSQL. Both follow every write in the
+# database itself, bulk updates included.
+FTS_TABLE = "tracker_transaction_fts"
+VECTOR_COLUMN = "search_vector"
+VECTOR_INDEX = "tracker_transaction_search_gin"
+FTS5 = "fts5"
+TSVECTOR = "tsvector"
+
+_backends = {}
+
+
+def search_backend(using="default"):
+    """
+    Return the search index available on a database (FTS5, TSVECTOR or
+    None when the index was never created there), checked once per alias
+    """
+    if using not in _backends:
+        connection = connections[using]
+        table = Transaction._meta.db_table
+        backend = None
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                if FTS_TABLE in connection.introspection.table_names(cursor):
+                    backend = FTS5
+            elif connection.vendor == "postgresql":
+                columns = connection.introspection.get_table_description(cursor, table)
+                if any(column.name == VECTOR_COLUMN for column in columns):
+                    backend = TSVECTOR
+        _backends[using] = backend
+    return _backends[using]
+
+
+class IndexMatch(Func):
+    """
+    SQL over the search index for the transaction row that `pk` resolves to.
+    The row and table are compiled from the queryset itself, so the outer
+    alias is used wherever the queryset ends up nested.
+    """
+
+    def __init__(self, pk, query, template, output_field):
+        super().__init__(pk, Value(query), output_field=output_field)
+        self.sql_template = template
+
+    def as_sql(self, compiler, connection, **extra_context):
+        pk, query = self.get_source_expressions()
+        row_sql, row_params = compiler.compile(pk)
+        query_sql, query_params = compiler.compile(query)
+        sql = self.sql_template.format(
+            row=row_sql,
+            table=compiler.quote_name_unless_alias(pk.alias),
+            query=query_sql,
+        )
+        # Every template places the query before the row
+        return sql, (*query_params, *row_params)
+
+
+def search_terms(value):
+    """
+    Split user input into word tokens; anything else is dropped so the
+    input can never be parsed as query syntax
+    """
+    return re.findall(r"\w+", value or "")
+
+
+def search_transactions(queryset, value):
+    """
+    Filter transactions to those whose party name or notes contain every
+    word of `value` as a word prefix, annotated with a relevance `rank`
+    (higher is better). Falls back to a substring match with rank 0 when
+    the database has no search index.
+    """
+    terms = search_terms(value)
+    if not terms:
+        return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+    backend = search_backend(queryset.db)
+    if backend == FTS5:
+        match = " ".join(f'"{term}"*' for term in terms)
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)
+            )
+        ).annotate(
+            # bm25() is lower-is-better; negate it to rank like ts_rank
+            rank=IndexMatch(
+                F("pk"),
+                match,
+                f"(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH {{query}} AND rowid = {{row}})",
+                FloatField(),
+            )
+        )
+    if backend == TSVECTOR:
+        query = " & ".join(f"{term}:*" for term in terms)
+        vector = f'{{table}}."{VECTOR_COLUMN}"'
+        return queryset.filter(
+            IndexMatch(
+                F("pk"),
+                query,
+                f"{vector} @@ to_tsquery('simple', {{query}})",
+                BooleanField(),
+            )
+        ).annotate(
+            rank=IndexMatch(
+                F("pk"),
+                query,
+                f"ts_rank({vector}, to_tsquery('simple', {{query}}))",
+                FloatField(),
+            )
+        )
+    return queryset.filter(
+        Q(party_name__icontains=value) | Q(notes__icontains=value)
+    ).annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def rebuild_search_index(using="default"):
+    """
+    Repopulate the search index from the transaction table, returning the
+    backend rebuilt or None when the database has no index
+    """
+    backend = search_backend(using)
+    with connections[using].cursor() as cursor:
+        if backend == FTS5:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif backend == TSVECTOR:
+            # The generated column is always current; only the index can bloat
+            cursor.execute(f"REINDEX INDEX {VECTOR_INDEX}")
+    return backend
@@ -8,6 +8,7 @@ from .models import (
     Category,
     CategoryBudget,
     GeneralBudget,
+    ImportJob,
     RecurringTransaction,
     SavingPlan,
     Transaction,
@@ -51,8 +52,11 @@ class TransactionSerializer(serializers.ModelSerializer):
             "savings_note",
             "recurring",
             "currency",
+            "amount_base",
+            "base_currency",
             "is_deleted",
         ]
+        read_only_fields = ["amount_base", "base_currency"]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -85,6 +89,8 @@ class ListTransactionSerializer(serializers.ModelSerializer):
             "transaction_date",
             "created_at",
             "currency",
+            "amount_base",
+            "base_currency",
             "is_deleted",
         ]
 
@@ -242,3 +248,80 @@ class BulkDeleteSerializer(serializers.Serializer):
     ids = serializers.ListField(
         child=serializers.IntegerField(), allow_empty=False
     )
+
+
+class BulkTransactionRowSerializer(serializers.ModelSerializer):
+    # Category and saving plan are plain ids here; the bulk create checks them
+    # against one prefetch each instead of a lookup per row
+    category = serializers.IntegerField(required=False, allow_null=True)
+    savings = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Transaction
+        fields = [
+            "party_name",
+            "amount",
+            "type",
+            "category",
+            "notes",
+            "transaction_date",
+            "add_savings",
+            "savings_percentage",
+            "savings",
+            "currency",
+        ]
+        extra_kwargs = {
+            "amount": {"required": True, "allow_null": False},
+            "type": {"required": True, "allow_null": False},
+        }
+
+    def validate(self, attrs):
+        if attrs.get("add_savings") and attrs.get("type") == "Income":
+            if not attrs.get("savings"):
+                raise serializers.ValidationError(
+                    {"savings": "A saving plan is required when add_savings is true"}
+                )
+            if attrs.get("savings_percentage") is None:
+                raise serializers.ValidationError(
+                    {
+                        "savings_percentage": "A percentage is required when add_savings is true"
+                    }
+                )
+        return attrs
+
+
+class BulkCreateTransactionSerializer(serializers.Serializer):
+    MAX_ROWS = 1000
+
+    transactions = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_ROWS
+    )
+
+
+class ImportTransactionsSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(
+        choices=["csv", "ofx", "qif"], required=False, help_text="Defaults to the file extension"
+    )
+    dayfirst = serializers.BooleanField(
+        default=False, help_text="Read ambiguous CSV dates such as 03/04/2025 as day/month"
+    )
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "format",
+            "status",
+            "processed_rows",
+            "created_count",
+            "duplicate_count",
+            "error_count",
+            "errors",
+            "message",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
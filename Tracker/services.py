@@ -1,18 +1,33 @@
 import os
 import tempfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 
-from django.db.models import Q, Sum
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+
+from django.db import IntegrityError
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 
 from Tracker.models import (
+    BudgetAlert,
+    BudgetPeriodCounter,
     Category,
     CategoryBudget,
+    DailyUserSummary,
     GeneralBudget,
     RecurringTransaction,
     SavingPlan,
+    Transaction,
 )
 
 from .utils import (
     extract_transaction_data,
+    get_user_timezone,
+    group_users_by_timezone,
     validate_category_exists,
     validate_saving_plan_exists,
 )
@@ -134,6 +149,176 @@ class TransactionService:
         )
         return "Recurring transaction created successfully"
 
+    @staticmethod
+    def queue_side_effects(transaction_id):
+
+        # Run savings processing and the limit check in a worker once the insert commits
+
+        from Tracker.cache import PENDING, set_transaction_side_effects
+        from Tracker.tasks import process_transaction_side_effects
+
+        def enqueue():
+            set_transaction_side_effects(transaction_id, PENDING)
+            process_transaction_side_effects.delay(transaction_id)
+
+        db_transaction.on_commit(enqueue)
+
+    @staticmethod
+    def run_side_effects(transaction):
+
+        # Savings processing and limit evaluation that follow a transaction create
+
+        from Tracker.cache import DONE, set_transaction_side_effects
+
+        with db_transaction.atomic():
+            savings_message = SavingsService.process_savings_from_income(transaction)
+        limit_message = BudgetService.get_general_limit_status(transaction.user)
+        set_transaction_side_effects(
+            transaction.id, DONE, limit=limit_message, savings_message=savings_message
+        )
+        return limit_message, savings_message
+
+    @staticmethod
+    def bulk_create_transactions(user, rows, batch_size=500):
+        """
+        Validate and insert many transactions of a user at once. Categories
+        and saving plans are checked against one prefetch each, rows are
+        inserted with bulk_create in chunks, and the rollup, savings and
+        cache effects are applied once for the whole batch. Invalid rows are
+        skipped and reported as {"index", "errors"}.
+
+        Returns (created transactions, row errors, savings messages).
+        """
+        from Tracker.cache import TRANSACTIONS, invalidate_dashboard_cache
+        from Tracker.currency import RateHistory, get_user_base_currency, to_base_amount
+        from Tracker.serializers import BulkTransactionRowSerializer
+
+        errors = []
+        valid = []
+        for index, row in enumerate(rows):
+            serializer = BulkTransactionRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({"index": index, "errors": serializer.errors})
+
+        categories = Category.objects.filter(
+            Q(user=user) | Q(user__isnull=True, is_system=True)
+        ).in_bulk({data["category"] for _, data in valid if data.get("category")})
+        saving_plans = SavingPlan.objects.filter(user=user).in_bulk(
+            {data["savings"] for _, data in valid if data.get("savings")}
+        )
+
+        base_currency = get_user_base_currency(user)
+        history = RateHistory(
+            {(data.get("currency", "NGN"), base_currency) for _, data in valid}
+        )
+        transactions = []
+        for index, data in valid:
+            data = dict(data)
+            category_id = data.pop("category", None)
+            savings_id = data.pop("savings", None)
+            if category_id and category_id not in categories:
+                errors.append(
+                    {"index": index, "errors": {"category": ["Category does not exist"]}}
+                )
+                continue
+            if savings_id and savings_id not in saving_plans:
+                errors.append(
+                    {"index": index, "errors": {"savings": ["Saving plan does not exist"]}}
+                )
+                continue
+
+            txn = Transaction(
+                user=user,
+                category=categories.get(category_id),
+                savings=saving_plans.get(savings_id),
+                **data,
+            )
+            if txn.savings is not None:
+                txn.savings_note = TransactionService.determine_savings_note(
+                    txn.savings, txn.savings_percentage, txn.type, txn.add_savings
+                )
+            on = timezone.localdate(txn.transaction_date) if txn.transaction_date else None
+            txn.amount_base, txn.exchange_rate = to_base_amount(
+                txn.amount, txn.currency, base_currency, on=on, history=history
+            )
+            txn.base_currency = base_currency
+            transactions.append(txn)
+        errors.sort(key=lambda error: error["index"])
+
+        savings_messages = []
+        if transactions:
+            tz = get_user_timezone(user)
+            with db_transaction.atomic():
+                for start in range(0, len(transactions), batch_size):
+                    Transaction.objects.bulk_create(
+                        transactions[start : start + batch_size]
+                    )
+                # bulk_create bypasses Transaction.save, so fold the rollup in once
+                DailySummaryService.apply(
+                    added=[
+                        contribution
+                        for contribution in (
+                            DailySummaryService.contribution(txn._rollup_row(), tz)
+                            for txn in transactions
+                        )
+                        if contribution
+                    ]
+                )
+                savings_messages = SavingsService.add_income_to_saving_plans(
+                    transactions
+                )
+                invalidate_dashboard_cache(user.id, TRANSACTIONS)
+        return transactions, errors, savings_messages
+
+    @staticmethod
+    def rebase_transactions(user, base_currency=None, only_stale=True, batch_size=1000):
+
+        # Recompute the amount_base snapshot of a user's transactions in batches
+
+        from Tracker.currency import (
+            RateHistory,
+            get_user_base_currency,
+            stale_base_amount_q,
+            to_base_amount,
+        )
+
+        if base_currency is None:
+            base_currency = get_user_base_currency(user)
+
+        queryset = Transaction.objects.filter(user=user)
+        if only_stale:
+            queryset = queryset.filter(stale_base_amount_q(base_currency))
+        ids = list(queryset.values_list("id", flat=True))
+        if not ids:
+            return 0
+
+        currencies = queryset.values_list("currency", flat=True).distinct()
+        history = RateHistory([(currency, base_currency) for currency in currencies])
+
+        for start in range(0, len(ids), batch_size):
+            batch = list(
+                Transaction.objects.filter(id__in=ids[start : start + batch_size]).only(
+                    "id", "amount", "currency", "transaction_date"
+                )
+            )
+            for txn in batch:
+                on = (
+                    timezone.localdate(txn.transaction_date)
+                    if txn.transaction_date
+                    else None
+                )
+                txn.amount_base, txn.exchange_rate = to_base_amount(
+                    txn.amount, txn.currency, base_currency, on=on, history=history
+                )
+                txn.base_currency = base_currency
+            Transaction.objects.bulk_update(batch, Transaction.BASE_AMOUNT_FIELDS)
+
+        # bulk_update bypasses Transaction.save, so refresh the rollup in one go
+        DailySummaryService.rebuild(user)
+        return len(ids)
+
 
 class SavingPlanService:
     # Service class for handling saving plan-related business logic
@@ -232,113 +417,445 @@ class BudgetService:
         except CategoryBudget.DoesNotExist:
             return False, None
 
+    PERIOD_STEPS = {
+        "Daily": relativedelta(days=1),
+        "Weekly": relativedelta(weeks=1),
+        "Monthly": relativedelta(months=1),
+        "Yearly": relativedelta(years=1),
+    }
+
     @staticmethod
-    def get_general_limit_status(user):
+    def period_start(period, day):
+        """
+        Return the first day of the budget period containing `day`; weeks
+        start on Sunday
+        """
+        if period == "Daily":
+            return day
+        if period == "Weekly":
+            return day - timedelta(days=(day.weekday() + 1) % 7)
+        if period == "Monthly":
+            return day.replace(day=1)
+        if period == "Yearly":
+            return day.replace(month=1, day=1)
+        raise ValueError(f"Unknown budget period: {period}")
+
+    @staticmethod
+    def get_period_window(period, tz, now=None):
+        """
+        Return the half-open [start, end) aware datetimes of the budget
+        period containing `now` in timezone `tz`
+        """
+        today = timezone.localdate(now, tz) if now else timezone.localdate(timezone=tz)
+        start = BudgetService.period_start(period, today)
+        return (
+            datetime.combine(start, time.min, tzinfo=tz),
+            datetime.combine(
+                start + BudgetService.PERIOD_STEPS[period], time.min, tzinfo=tz
+            ),
+        )
+
+    @staticmethod
+    def period_expenses(user, start, end):
 
-        # Get the general spending limit status for a user
+        # Expenses in [start, end): a plain range on the (user, transaction_date) index
+
+        return Transaction.objects.filter(
+            user=user,
+            type="Expense",
+            is_deleted=False,
+            transaction_date__gte=start,
+            transaction_date__lt=end,
+        )
+
+    @staticmethod
+    def get_category_budget_statuses(user):
+
+        # Spent, remaining and percentage for every category budget of a user,
+        # with one grouped aggregation per distinct budget period
+
+        from Tracker.currency import get_user_base_currency, sum_in_base_currency
+
+        budgets = list(
+            CategoryBudget.objects.filter(user=user)
+            .select_related("category")
+            .order_by("period", "name")
+        )
+        tz = get_user_timezone(user)
+        base_currency = get_user_base_currency(user)
+
+        spent = {}
+        windows = {}
+        for period in {budget.period for budget in budgets}:
+            try:
+                windows[period] = BudgetService.get_period_window(period, tz)
+            except ValueError:
+                continue
+            expenses = BudgetService.period_expenses(user, *windows[period]).filter(
+                category_id__in=[
+                    budget.category_id for budget in budgets if budget.period == period
+                ]
+            )
+            for row in sum_in_base_currency(expenses, ["category_id"], base_currency):
+                spent[(period, row["category_id"])] = row["total"]
+
+        statuses = []
+        for budget in budgets:
+            if budget.period not in windows:
+                continue
+            amount = float(budget.amount)
+            budget_spent = spent.get((budget.period, budget.category_id), 0.0)
+            start, end = windows[budget.period]
+            statuses.append(
+                {
+                    "id": budget.id,
+                    "name": budget.name,
+                    "category": budget.category.name if budget.category else None,
+                    "period": budget.period,
+                    "period_start": start.isoformat(),
+                    "period_end": end.isoformat(),
+                    "amount": round(amount, 2),
+                    "spent": round(budget_spent, 2),
+                    "remaining": round(max(amount - budget_spent, 0), 2),
+                    "percentage": (
+                        round(budget_spent / amount * 100, 2) if amount else 0.0
+                    ),
+                }
+            )
+        return {"base_currency": base_currency, "budgets": statuses}
 
-        from datetime import date, datetime, timedelta
+    @staticmethod
+    def get_general_limit_status(user):
 
-        from Tracker.models import Transaction
-        from Tracker.utils import convert_currency
+        # Get the general spending limit status for a user from the running period counter
 
         try:
             general_limit = GeneralBudget.objects.get(user=user)
-            current_month = datetime.now().month
-            current_year = datetime.now().year
+        except GeneralBudget.DoesNotExist:
+            return "User does not have a general spending limit"
+
+        period = general_limit.period
+        if period not in BudgetCounterService.PERIODS:
+            return None
+
+        cost = float(BudgetCounterService.get_spent(user, period))
+        if cost >= float(general_limit.amount):
+            return f"Your {period} Limit has been Reached"
+        remaining = float(general_limit.amount) - cost
+        return f"{remaining:.2f} remaining to reach your {period} Limit"
+
+
+class BudgetCounterService:
+    # Service class for the running per-period expense counters behind limit checks
+
+    PERIODS = ("Daily", "Weekly", "Monthly", "Yearly")
+    CACHE_TTL = 300
+    # Counters older than this are no longer read and get pruned nightly
+    RETENTION_DAYS = 400
+
+    @staticmethod
+    def version_key(user_id):
+        return f"budget_counter_version_{user_id}"
+
+    @staticmethod
+    def cache_key(user_id, period, start, version):
+        return f"budget_counter_{user_id}_{version}_{period}_{start.isoformat()}"
+
+    @staticmethod
+    def get_version(user_id):
+
+        # A user's counter cache version; a lost stamp restarts from the clock,
+        # above every version handed out before it
+
+        key = BudgetCounterService.version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, int(timezone.now().timestamp() * 1_000_000), None)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def invalidate(user_ids):
 
+        # Move users to a new cache version so no earlier read can be served again
+
+        for user_id in user_ids:
             try:
-                base_currency = user.profile.base_currency
-            except user._meta.model.profile.RelatedObjectDoesNotExist:
-                base_currency = "NGN"
-
-            if general_limit.period == "Monthly":
-                expenses = Transaction.objects.filter(
-                    user=user,
-                    type="Expense",
-                    transaction_date__month=current_month,
-                    transaction_date__year=current_year,
-                ).values("currency").annotate(total=Sum("amount"))
-
-                cost = float(sum(
-                    convert_currency(e["total"], e["currency"], base_currency)
-                    for e in expenses
-                ))
-
-                if cost >= float(general_limit.amount):
-                    return "Your Monthly Limit has been Reached"
-                else:
-                    remaining = float(general_limit.amount) - cost
-                    return f"{remaining:.2f} remaining to reach your Monthly Limit"
-
-            elif general_limit.period == "Weekly":
-                today = date.today()
-                start_of_week = today - timedelta(
-                    days=(today.weekday() + 1) % 7
+                cache.incr(BudgetCounterService.version_key(user_id))
+            except ValueError:
+                # No stamp: the next read starts a fresh version
+                pass
+
+    @staticmethod
+    def _cents(amount):
+        # Cached as integer cents
+        return int((Decimal(amount) * 100).to_integral_value())
+
+    @staticmethod
+    def apply(expense_deltas):
+        """
+        Add {(user_id, local day): amount} expense deltas to the counters of
+        every period containing each day. Each counter is one UPDATE (or
+        INSERT for a period's first expense), so a new period rolls over to
+        a fresh counter on its own. The cached copies are invalidated once
+        the transaction commits.
+        """
+        counters = {}
+        for (user_id, day), delta in expense_deltas.items():
+            for period in BudgetCounterService.PERIODS:
+                key = (user_id, period, BudgetService.period_start(period, day))
+                counters[key] = counters.get(key, 0) + delta
+
+        counters = {key: delta for key, delta in counters.items() if delta}
+        with db_transaction.atomic():
+            for (user_id, period, start), delta in counters.items():
+                lookup = dict(user_id=user_id, period=period, period_start=start)
+                counter = BudgetPeriodCounter.objects.filter(**lookup)
+                if counter.update(spent=F("spent") + delta):
+                    continue
+                try:
+                    with db_transaction.atomic():
+                        BudgetPeriodCounter.objects.create(**lookup, spent=delta)
+                except IntegrityError:
+                    # A concurrent write inserted it first
+                    counter.update(spent=F("spent") + delta)
+
+        if counters:
+            user_ids = {user_id for user_id, _, _ in counters}
+            db_transaction.on_commit(lambda: BudgetCounterService.invalidate(user_ids))
+
+    @staticmethod
+    def get_spent(user, period, tz=None):
+        """
+        Return a user's expense total for the current period, from the cache
+        or, on a miss, the counter row; no row means nothing was spent yet
+        """
+        tz = tz or get_user_timezone(user)
+        start = BudgetService.period_start(period, timezone.localdate(timezone=tz))
+        # Taking the version before reading the row means a write committing
+        # in between moves readers past whatever this read stores
+        version = BudgetCounterService.get_version(user.id)
+        key = BudgetCounterService.cache_key(user.id, period, start, version)
+        cents = cache.get(key)
+        if cents is None:
+            spent = (
+                BudgetPeriodCounter.objects.filter(
+                    user=user, period=period, period_start=start
                 )
-                end_of_week = start_of_week + timedelta(days=6)
-
-                expenses = Transaction.objects.filter(
-                    user=user,
-                    type="Expense",
-                    transaction_date__gte=start_of_week,
-                    transaction_date__lte=end_of_week,
-                ).values("currency").annotate(total=Sum("amount"))
-
-                cost = float(sum(
-                    convert_currency(e["total"], e["currency"], base_currency)
-                    for e in expenses
-                ))
-
-                if cost >= float(general_limit.amount):
-                    return "Your Weekly Limit has been Reached"
-                else:
-                    remaining = float(general_limit.amount) - cost
-                    return f"{remaining:.2f} remaining to reach your Weekly Limit"
-
-            elif general_limit.period == "Daily":
-                today = date.today()
-                expenses = Transaction.objects.filter(
-                    user=user, type="Expense", transaction_date__date=today
-                ).values("currency").annotate(total=Sum("amount"))
-
-                cost = float(sum(
-                    convert_currency(e["total"], e["currency"], base_currency)
-                    for e in expenses
-                ))
-
-                if cost >= float(general_limit.amount):
-                    return "Your Daily Limit has been Reached"
-                else:
-                    remaining = float(general_limit.amount) - cost
-                    return f"{remaining:.2f} remaining to reach your Daily Limit"
-
-            elif general_limit.period == "Yearly":
-                expenses = Transaction.objects.filter(
-                    user=user,
-                    type="Expense",
-                    transaction_date__year=current_year,
-                ).values("currency").annotate(total=Sum("amount"))
-
-                cost = float(sum(
-                    convert_currency(e["total"], e["currency"], base_currency)
-                    for e in expenses
-                ))
-
-                if cost >= float(general_limit.amount):
-                    return "Your Yearly Limit has been Reached"
-                else:
-                    remaining = float(general_limit.amount) - cost
-                    return f"{remaining:.2f} remaining to reach your Yearly Limit"
+                .values_list("spent", flat=True)
+                .first()
+            )
+            cents = BudgetCounterService._cents(spent or 0)
+            cache.add(key, cents, BudgetCounterService.CACHE_TTL)
+        return Decimal(cents) / 100
 
-            return None
-        except GeneralBudget.DoesNotExist:
-            return "User does not have a general spending limit"
+    @staticmethod
+    def reconcile(user_ids, today=None):
+        """
+        Recompute the current-period counters of the given users from the
+        daily rollup, with one grouped query per timezone and period,
+        overwrite the rows and invalidate their cached copies. Returns the
+        number of counters written.
+        """
+        counters = []
+        for tz, ids in group_users_by_timezone(user_ids).items():
+            local_today = today or timezone.localdate(timezone=tz)
+            for period in BudgetCounterService.PERIODS:
+                start = BudgetService.period_start(period, local_today)
+                spent = dict(
+                    DailyUserSummary.objects.filter(
+                        user_id__in=ids,
+                        type="Expense",
+                        day__gte=start,
+                        day__lt=start + BudgetService.PERIOD_STEPS[period],
+                    )
+                    .values("user_id")
+                    .annotate(total=Sum("total_base"))
+                    .values_list("user_id", "total")
+                )
+                counters.extend(
+                    BudgetPeriodCounter(
+                        user_id=user_id,
+                        period=period,
+                        period_start=start,
+                        spent=spent.get(user_id) or 0,
+                    )
+                    for user_id in ids
+                )
+
+        BudgetPeriodCounter.objects.bulk_create(
+            counters,
+            update_conflicts=True,
+            unique_fields=["user", "period", "period_start"],
+            update_fields=["spent", "updated_at"],
+            batch_size=1000,
+        )
+        reconciled = {counter.user_id for counter in counters}
+        db_transaction.on_commit(lambda: BudgetCounterService.invalidate(reconciled))
+        return len(counters)
+
+    @staticmethod
+    def prune(today=None):
+
+        # Drop counters of periods that ended long ago
+
+        cutoff = (today or timezone.localdate()) - timedelta(
+            days=BudgetCounterService.RETENTION_DAYS
+        )
+        return BudgetPeriodCounter.objects.filter(period_start__lt=cutoff).delete()[0]
+
+
+class BudgetAlertService:
+    # Service class for evaluating budgets in batches and recording threshold crossings
+
+    THRESHOLDS = (50, 80, 100)
+
+    @staticmethod
+    def evaluate(user_ids, today=None):
+        """
+        Evaluate the general and category budgets of a chunk of users for
+        their current periods and record every threshold newly crossed.
+        Spending comes from the daily rollup with one grouped query per
+        timezone and budget period in use, so the query count does not grow
+        with the number of users. Returns the new alerts.
+        """
+        budgets = [
+            ("General", budget)
+            for budget in GeneralBudget.objects.filter(user_id__in=user_ids)
+        ] + [
+            ("Category", budget)
+            for budget in CategoryBudget.objects.filter(user_id__in=user_ids)
+        ]
+        periods = {}
+        for _, budget in budgets:
+            periods.setdefault(budget.user_id, set()).add(budget.period)
+        if not periods:
+            return []
+
+        starts = {}
+        totals = {}
+        for tz, ids in group_users_by_timezone(periods).items():
+            local_today = today or timezone.localdate(timezone=tz)
+            for period in BudgetCounterService.PERIODS:
+                period_ids = [user_id for user_id in ids if period in periods[user_id]]
+                if not period_ids:
+                    continue
+                start = BudgetService.period_start(period, local_today)
+                rows = (
+                    DailyUserSummary.objects.filter(
+                        user_id__in=period_ids,
+                        type="Expense",
+                        day__gte=start,
+                        day__lt=start + BudgetService.PERIOD_STEPS[period],
+                    )
+                    .values("user_id", "category_id")
+                    .annotate(total=Sum("total_base"))
+                )
+                for user_id in period_ids:
+                    starts[(user_id, period)] = start
+                for row in rows:
+                    total = row["total"] or 0
+                    general_key = (row["user_id"], period, None)
+                    totals[general_key] = totals.get(general_key, 0) + total
+                    if row["category_id"] is not None:
+                        # Uncategorized spending only counts toward the general budget
+                        totals[(row["user_id"], period, row["category_id"])] = total
+
+        alerts = []
+        for budget_type, budget in budgets:
+            start = starts.get((budget.user_id, budget.period))
+            if start is None or not budget.amount:
+                continue
+            category_id = budget.category_id if budget_type == "Category" else None
+            spent = totals.get((budget.user_id, budget.period, category_id), 0)
+            percentage = spent / budget.amount * 100
+            alerts.extend(
+                BudgetAlert(
+                    user_id=budget.user_id,
+                    budget_type=budget_type,
+                    budget_id=budget.id,
+                    name=budget.name,
+                    period=budget.period,
+                    period_start=start,
+                    threshold=threshold,
+                    spent=spent,
+                    amount=budget.amount,
+                )
+                for threshold in BudgetAlertService.THRESHOLDS
+                if percentage >= threshold
+            )
+        if not alerts:
+            return []
+
+        recorded = set(
+            BudgetAlert.objects.filter(
+                user_id__in=periods, period_start__in={a.period_start for a in alerts}
+            ).values_list("budget_type", "budget_id", "period_start", "threshold")
+        )
+        new_alerts = [
+            alert
+            for alert in alerts
+            if (alert.budget_type, alert.budget_id, alert.period_start, alert.threshold)
+            not in recorded
+        ]
+        # ignore_conflicts covers an overlapping run recording the same crossing
+        BudgetAlert.objects.bulk_create(new_alerts, ignore_conflicts=True)
+        return new_alerts
+
+    @staticmethod
+    def build_digest(alerts):
+
+        # One message body for a user's pending alerts, the highest threshold per budget
+
+        highest = {}
+        for alert in alerts:
+            key = (alert.budget_type, alert.budget_id, alert.period_start)
+            if key not in highest or alert.threshold > highest[key].threshold:
+                highest[key] = alert
+        lines = [
+            f"- {alert.name}: {alert.threshold}% of your {alert.period} budget used "
+            f"({alert.spent:.2f} of {alert.amount:.2f})"
+            for alert in sorted(highest.values(), key=lambda a: (-a.threshold, a.name))
+        ]
+        return "Budget alerts since your last digest:\n\n" + "\n".join(lines)
 
 
 class SavingsService:
     # Service class for handling savings-related business logics
 
+    @staticmethod
+    def add_income_to_saving_plans(transactions):
+
+        # Add the savings share of many income transactions with one update per active plan
+
+        shares = {}
+        for txn in transactions:
+            if txn.type == "Income" and txn.add_savings and txn.savings_id:
+                share = (txn.amount * txn.savings_percentage / 100).quantize(
+                    Decimal("0.01")
+                )
+                shares[txn.savings_id] = shares.get(txn.savings_id, 0) + share
+
+        messages = []
+        plans = SavingPlan.objects.select_for_update().filter(
+            id__in=shares, status="Active"
+        )
+        for savings in plans.order_by("id"):
+            savings.savings_reached_amount += shares[savings.id]
+            if savings.savings_reached_amount >= savings.savings_amount:
+                savings.savings_reached_amount = savings.savings_amount
+                savings.savings_reached = True
+                messages.append(f"{savings.name} saving goal reached")
+            else:
+                remaining_amount = (
+                    savings.savings_amount - savings.savings_reached_amount
+                )
+                messages.append(
+                    f"{savings.name} saving goal remaining {remaining_amount} to be completed"
+                )
+            savings.save(update_fields=["savings_reached_amount", "savings_reached"])
+        return messages
+
     @staticmethod
     def process_savings_from_income(transaction):
         """
@@ -385,3 +902,141 @@ class SavingsService:
             return None
 
         return "You are making an Expense or add savings is False"
+
+
+class DailySummaryService:
+    # Service class for keeping DailyUserSummary in step with transactions
+
+    @staticmethod
+    def contribution(row, tz=None):
+        """
+        Return (key, amount, amount_base) for a transaction's ROLLUP_FIELDS,
+        or None when it does not count towards the rollup. The day is taken
+        in the owner's timezone.
+        """
+        if row["is_deleted"] or row["transaction_date"] is None:
+            return None
+        key = (
+            row["user_id"],
+            timezone.localdate(row["transaction_date"], tz),
+            row["type"],
+            row["category_id"],
+            row["currency"],
+        )
+        amount = row["amount"] or Decimal("0")
+        # Rows with no known rate count unconverted, as convert_currency does
+        amount_base = row["amount_base"] if row["amount_base"] is not None else amount
+        return key, amount, amount_base
+
+    @staticmethod
+    def apply(removed=(), added=()):
+
+        # Fold contributions into per-key deltas and apply each with one UPDATE (or INSERT)
+
+        deltas = {}
+        expense_deltas = {}
+        for sign, contributions in ((-1, removed), (1, added)):
+            for key, amount, amount_base in contributions:
+                total, total_base, count = deltas.get(key, (0, 0, 0))
+                deltas[key] = (
+                    total + sign * amount,
+                    total_base + sign * amount_base,
+                    count + sign,
+                )
+                if key[2] == "Expense":
+                    day_key = key[:2]
+                    expense_deltas[day_key] = (
+                        expense_deltas.get(day_key, 0) + sign * amount_base
+                    )
+
+        with db_transaction.atomic():
+            for (user_id, day, type_, category_id, currency), delta in deltas.items():
+                total, total_base, count = delta
+                if not (total or total_base or count):
+                    continue
+                key = dict(
+                    user_id=user_id,
+                    day=day,
+                    type=type_,
+                    category_id=category_id,
+                    currency=currency,
+                )
+                summary = DailyUserSummary.objects.filter(**key)
+                changes = dict(
+                    total=F("total") + total,
+                    total_base=F("total_base") + total_base,
+                    count=F("count") + count,
+                )
+                if summary.update(**changes):
+                    continue
+                try:
+                    with db_transaction.atomic():
+                        DailyUserSummary.objects.create(
+                            **key, total=total, total_base=total_base, count=count
+                        )
+                except IntegrityError:
+                    # A concurrent write inserted it first
+                    summary.update(**changes)
+            BudgetCounterService.apply(expense_deltas)
+
+    @staticmethod
+    def remove_queryset(queryset, tz=None):
+
+        # Subtract live transactions about to be changed by a bulk queryset.update()
+
+        rows = queryset.filter(is_deleted=False).values(*Transaction.ROLLUP_FIELDS)
+        removed = [
+            contribution
+            for contribution in (
+                DailySummaryService.contribution(row, tz) for row in rows
+            )
+            if contribution
+        ]
+        DailySummaryService.apply(removed=removed)
+
+    @staticmethod
+    def remove_cascaded(queryset):
+
+        # Subtract live transactions about to be removed by a cascading delete,
+        # which never calls Transaction.delete()
+
+        user_ids = set(queryset.filter(is_deleted=False).values_list("user_id", flat=True))
+        for tz, ids in group_users_by_timezone(user_ids).items():
+            DailySummaryService.remove_queryset(queryset.filter(user_id__in=ids), tz)
+
+    @staticmethod
+    def rebuild(user):
+
+        # Recompute a user's rollup from their transactions
+
+        rows = (
+            Transaction.objects.filter(
+                user=user, is_deleted=False, transaction_date__isnull=False
+            )
+            .annotate(day=TruncDate("transaction_date", tzinfo=get_user_timezone(user)))
+            .values("day", "type", "category_id", "currency")
+            .annotate(
+                total=Sum("amount"),
+                total_base=Sum("amount_base"),
+                raw_unconverted=Sum("amount", filter=Q(amount_base__isnull=True)),
+                count=Count("id"),
+            )
+        )
+        summaries = [
+            DailyUserSummary(
+                user=user,
+                day=row["day"],
+                type=row["type"],
+                category_id=row["category_id"],
+                currency=row["currency"],
+                total=row["total"] or 0,
+                total_base=(row["total_base"] or 0) + (row["raw_unconverted"] or 0),
+                count=row["count"],
+            )
+            for row in rows
+        ]
+        with db_transaction.atomic():
+            DailyUserSummary.objects.filter(user=user).delete()
+            DailyUserSummary.objects.bulk_create(summaries, batch_size=1000)
+            BudgetCounterService.reconcile([user.id])
+        return len(summaries)
@@ -1,12 +1,47 @@
+import logging
 import os
+import time
 from datetime import date
 
 import requests
 from celery import shared_task
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.mail import send_mass_mail
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
-from Tracker.models import CurrencyExchangeRate, RecurringTransaction, Transaction
+from Tracker.cache import (
+    TRANSACTIONS,
+    dashboard_refresh_key,
+    invalidate_dashboard_cache,
+)
+from Tracker.currency import PIVOT_CURRENCY, build_cross_rates, bump_rates_version
+from Tracker.dashboard import ALL_SECTIONS, refresh_dashboard
+from Tracker.importers import run_import
+from Tracker.models import (
+    BudgetAlert,
+    CategoryBudget,
+    CurrencyExchangeRate,
+    ExchangeRateHistory,
+    GeneralBudget,
+    ImportJob,
+    RecurringTransaction,
+    Transaction,
+)
+from Tracker.services import (
+    BudgetAlertService,
+    BudgetCounterService,
+    DailySummaryService,
+    TransactionService,
+)
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
 
 
 @shared_task
@@ -44,6 +79,7 @@ def process_due_recurring_transactions():
                 deactivated_count += 1
 
             rt.save()
+            invalidate_dashboard_cache(rt.user_id, TRANSACTIONS)
             created_count += 1
 
     return f"Created {created_count} transactions, deactivated {deactivated_count} recurring plans"
@@ -55,7 +91,8 @@ def update_exchange_rates():
     if not api_key:
         return "EXCHANGE_RATE_API_KEY not set, skipping rate update"
 
-    base = "USD"
+    base = PIVOT_CURRENCY
+    started = time.monotonic()
     try:
         resp = requests.get(
             f"https://v6.exchangerate-api.com/v6/{api_key}/latest/{base}",
@@ -64,29 +101,203 @@ def update_exchange_rates():
         resp.raise_for_status()
         data = resp.json()
         rates = data.get("conversion_rates", {})
-
-        from Account.models import CURRENCIES
-        supported = [code for code, _ in CURRENCIES]
-
-        count = 0
-        for target, rate in rates.items():
-            if target in supported and target != base:
-                CurrencyExchangeRate.objects.update_or_create(
-                    base_currency=base,
-                    target_currency=target,
-                    defaults={"rate": rate},
-                )
-                count += 1
-
-        for target in supported:
-            if target != base and target in rates:
-                inverse_rate = 1.0 / rates[target]
-                CurrencyExchangeRate.objects.update_or_create(
-                    base_currency=target,
-                    target_currency=base,
-                    defaults={"rate": inverse_rate},
-                )
-
-        return f"Updated {count} exchange rates"
     except requests.RequestException as e:
         return f"Failed to update exchange rates: {e}"
+    fetched = time.monotonic()
+
+    from Account.models import CURRENCIES
+    supported = [code for code, _ in CURRENCIES]
+
+    pivot_rates = {
+        code: rates[code] for code in supported if code != base and code in rates
+    }
+    cross_rates = build_cross_rates(pivot_rates, pivot=base)
+
+    today = timezone.localdate()
+    latest = [
+        CurrencyExchangeRate(base_currency=pair[0], target_currency=pair[1], rate=rate)
+        for pair, rate in cross_rates.items()
+    ]
+    history = [
+        ExchangeRateHistory(
+            base_currency=pair[0],
+            target_currency=pair[1],
+            effective_date=today,
+            rate=rate,
+        )
+        for pair, rate in cross_rates.items()
+    ]
+
+    # One transaction so readers never see a half-refreshed matrix; caches
+    # reload once, after the new rates are visible.
+    with transaction.atomic():
+        CurrencyExchangeRate.objects.bulk_create(
+            latest,
+            update_conflicts=True,
+            unique_fields=["base_currency", "target_currency"],
+            update_fields=["rate", "updated_at"],
+        )
+        ExchangeRateHistory.objects.bulk_create(
+            history,
+            update_conflicts=True,
+            unique_fields=["base_currency", "target_currency", "effective_date"],
+            update_fields=["rate"],
+        )
+        transaction.on_commit(bump_rates_version)
+
+    finished = time.monotonic()
+    logger.info(
+        "Exchange rates refreshed: %d pairs, %d history rows "
+        "(fetch %.3fs, write %.3fs)",
+        len(latest),
+        len(history),
+        fetched - started,
+        finished - fetched,
+    )
+    return (
+        f"Updated {len(latest)} exchange rates and {len(history)} history rows "
+        f"in {finished - started:.2f}s"
+    )
+
+
+@shared_task
+def rebase_user_transactions(user_id):
+    try:
+        user = User.objects.select_related("profile").get(id=user_id)
+    except User.DoesNotExist:
+        return f"User {user_id} not found"
+
+    updated = TransactionService.rebase_transactions(user)
+    invalidate_dashboard_cache(user_id)
+    return f"Rebased {updated} transactions for user {user_id}"
+
+
+@shared_task
+def process_transaction_side_effects(transaction_id):
+    try:
+        txn = Transaction.objects.select_related("user", "savings").get(
+            id=transaction_id
+        )
+    except Transaction.DoesNotExist:
+        return f"Transaction {transaction_id} not found"
+
+    TransactionService.run_side_effects(txn)
+    return f"Processed side effects for transaction {transaction_id}"
+
+
+@shared_task
+def rebuild_user_summaries(user_id):
+    try:
+        user = User.objects.select_related("profile").get(id=user_id)
+    except User.DoesNotExist:
+        return f"User {user_id} not found"
+
+    rebuilt = DailySummaryService.rebuild(user)
+    invalidate_dashboard_cache(user_id)
+    return f"Rebuilt {rebuilt} daily summaries for user {user_id}"
+
+
+@shared_task
+def refresh_dashboard_cache(user_id, period, sections=None):
+    sections = tuple(sections or ALL_SECTIONS)
+    try:
+        user = User.objects.select_related("profile").get(id=user_id)
+        refresh_dashboard(user, period, sections)
+    except User.DoesNotExist:
+        return f"User {user_id} not found"
+    finally:
+        cache.delete(dashboard_refresh_key(user_id, period, *sections))
+    return f"Refreshed {period} dashboard for user {user_id}"
+
+
+@shared_task
+def reconcile_budget_counters(batch_size=1000):
+    # Nightly: rewrite every user's current-period counters from the rollup
+    # to correct any drift, then drop counters of long-finished periods
+    user_ids = User.objects.order_by("id").values_list("id", flat=True)
+    reconciled = 0
+    last_id = 0
+    while True:
+        batch = list(user_ids.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        reconciled += BudgetCounterService.reconcile(batch)
+        last_id = batch[-1]
+
+    pruned = BudgetCounterService.prune()
+    return f"Reconciled {reconciled} budget counters, pruned {pruned}"
+
+
+@shared_task
+def evaluate_budgets(batch_size=500):
+    # Nightly: evaluate every budget in chunks of users and queue one digest
+    # task per chunk for the users with new threshold crossings
+    user_ids = (
+        User.objects.filter(
+            Q(id__in=GeneralBudget.objects.values("user_id"))
+            | Q(id__in=CategoryBudget.objects.values("user_id"))
+        )
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    recorded = 0
+    last_id = 0
+    while True:
+        batch = list(user_ids.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        alerts = BudgetAlertService.evaluate(batch)
+        if alerts:
+            recorded += len(alerts)
+            alerted = sorted({alert.user_id for alert in alerts})
+            transaction.on_commit(
+                lambda alerted=alerted: send_budget_alert_digests.delay(alerted)
+            )
+        last_id = batch[-1]
+
+    return f"Recorded {recorded} budget alerts"
+
+
+@shared_task
+def send_budget_alert_digests(user_ids):
+    pending = (
+        BudgetAlert.objects.filter(user_id__in=user_ids, notified_at__isnull=True)
+        .select_related("user")
+        .order_by("user_id")
+    )
+    by_user = {}
+    for alert in pending:
+        by_user.setdefault(alert.user, []).append(alert)
+
+    messages = [
+        (
+            f"Your {settings.SITE_NAME} budget alerts",
+            BudgetAlertService.build_digest(alerts),
+            None,
+            [user.email],
+        )
+        for user, alerts in by_user.items()
+        if user.email
+    ]
+    # One connection for the whole batch
+    sent = send_mass_mail(messages, fail_silently=False) if messages else 0
+    BudgetAlert.objects.filter(
+        id__in=[alert.id for alerts in by_user.values() for alert in alerts]
+    ).update(notified_at=timezone.now())
+    return f"Sent {sent} budget alert digests"
+
+
+@shared_task
+def import_transactions(job_id):
+    try:
+        job = ImportJob.objects.select_related("user__profile").get(
+            id=job_id, status="Pending"
+        )
+    except ImportJob.DoesNotExist:
+        return f"Import job {job_id} not found or already started"
+
+    job = run_import(job)
+    return (
+        f"Import job {job_id} {job.status.lower()}: {job.created_count} created, "
+        f"{job.duplicate_count} duplicates, {job.error_count} errors"
+    )
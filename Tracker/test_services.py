@@ -1,11 +1,18 @@
 import pytest
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from model_bakery import baker
 
 from django.contrib.auth import get_user_model
-from Tracker.models import SavingPlan, Transaction, GeneralBudget
-from Tracker.services import SavingPlanService, BudgetService
+from django.core.cache import cache
+from django.utils import timezone
+from Tracker.models import (
+    BudgetPeriodCounter,
+    SavingPlan,
+    Transaction,
+    GeneralBudget,
+)
+from Tracker.services import BudgetCounterService, SavingPlanService, BudgetService
 
 User = get_user_model()
 
@@ -54,6 +61,10 @@ class TestSavingPlanService:
 
 @pytest.mark.django_db
 class TestBudgetService:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
     def test_general_limit_monthly_not_reached(self):
         user = baker.make(User)
         baker.make(
@@ -89,3 +100,410 @@ class TestBudgetService:
         user = baker.make(User)
         result = BudgetService.get_general_limit_status(user)
         assert "does not have a general spending limit" in result
+
+    @pytest.mark.parametrize(
+        "period, start, end",
+        [
+            ("Daily", datetime(2025, 3, 12), datetime(2025, 3, 13)),
+            ("Weekly", datetime(2025, 3, 9), datetime(2025, 3, 16)),
+            ("Monthly", datetime(2025, 3, 1), datetime(2025, 4, 1)),
+            ("Yearly", datetime(2025, 1, 1), datetime(2026, 1, 1)),
+        ],
+    )
+    def test_period_window_is_half_open_in_user_timezone(self, period, start, end):
+        from zoneinfo import ZoneInfo
+
+        lagos = ZoneInfo("Africa/Lagos")
+        # 23:30 UTC on the 11th is already the 12th in Lagos
+        now = datetime(2025, 3, 11, 23, 30, tzinfo=ZoneInfo("UTC"))
+        assert BudgetService.get_period_window(period, lagos, now) == (
+            start.replace(tzinfo=lagos),
+            end.replace(tzinfo=lagos),
+        )
+
+    def test_period_expenses_range_scan_uses_user_date_index(self):
+        from django.db import connection
+
+        if connection.vendor != "sqlite":
+            pytest.skip("plan text asserted for SQLite")
+        from zoneinfo import ZoneInfo
+
+        index = next(
+            index.name
+            for index in Transaction._meta.indexes
+            if index.fields == ["user", "transaction_date"]
+        )
+        start, end = BudgetService.get_period_window("Monthly", ZoneInfo("UTC"))
+        plan = BudgetService.period_expenses(baker.make(User), start, end).explain()
+        assert f"USING INDEX {index} (user_id=? AND transaction_date>? AND transaction_date<?)" in plan
+
+
+@pytest.mark.django_db
+class TestBudgetCounters:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    def spent(self, user, period="Monthly"):
+        start = BudgetService.period_start(period, timezone.localdate())
+        return BudgetPeriodCounter.objects.get(
+            user=user, period=period, period_start=start
+        ).spent
+
+    def test_counters_follow_every_write(self):
+        user = baker.make(User)
+        txn = baker.make(
+            Transaction, user=user, type="Expense", amount=Decimal("100")
+        )
+        for period in BudgetCounterService.PERIODS:
+            assert self.spent(user, period) == Decimal("100")
+
+        txn.amount = Decimal("150")
+        txn.save()
+        assert self.spent(user) == Decimal("150")
+
+        txn.is_deleted = True
+        txn.save()
+        assert self.spent(user) == Decimal("0")
+
+        txn.is_deleted = False
+        txn.save()
+        assert self.spent(user) == Decimal("150")
+
+        txn.delete()
+        assert self.spent(user) == Decimal("0")
+
+    def test_previous_period_expense_rolls_into_its_own_counter(self):
+        user = baker.make(User)
+        baker.make(
+            Transaction, user=user, type="Expense", amount=Decimal("50")
+        )
+        last_year = timezone.now() - timedelta(days=370)
+        baker.make(
+            Transaction,
+            user=user,
+            type="Expense",
+            amount=Decimal("80"),
+            transaction_date=last_year,
+        )
+        assert self.spent(user, "Yearly") == Decimal("50")
+        assert BudgetCounterService.get_spent(user, "Yearly") == Decimal("50")
+
+    def test_limit_check_reads_the_counter(self, django_assert_max_num_queries):
+        user = baker.make(User)
+        baker.make(GeneralBudget, user=user, period="Monthly", amount=Decimal("500"))
+        baker.make(
+            Transaction, user=user, type="Expense", amount=Decimal("200")
+        )
+        user = User.objects.select_related("profile").get(id=user.id)
+
+        with django_assert_max_num_queries(2):
+            result = BudgetService.get_general_limit_status(user)
+        assert result == "300.00 remaining to reach your Monthly Limit"
+        # The cached counter leaves only the budget lookup
+        with django_assert_max_num_queries(1):
+            BudgetService.get_general_limit_status(user)
+
+    def test_late_cache_fill_from_a_racing_read_is_never_served(
+        self, django_capture_on_commit_callbacks
+    ):
+        user = baker.make(User)
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(Transaction, user=user, type="Expense", amount=Decimal("100"))
+        assert BudgetCounterService.get_spent(user, "Monthly") == Decimal("100")
+
+        # A read misses, takes the version and loads the row; a write commits
+        # before that read stores the value it loaded
+        version = BudgetCounterService.get_version(user.id)
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(Transaction, user=user, type="Expense", amount=Decimal("50"))
+        start = BudgetService.period_start("Monthly", timezone.localdate())
+        cache.set(
+            BudgetCounterService.cache_key(user.id, "Monthly", start, version), 10000
+        )
+        assert BudgetCounterService.get_spent(user, "Monthly") == Decimal("150")
+
+    def test_reconcile_corrects_drift_and_prunes_old_counters(self):
+        user = baker.make(User)
+        baker.make(
+            Transaction, user=user, type="Expense", amount=Decimal("75")
+        )
+        BudgetPeriodCounter.objects.filter(user=user).update(spent=Decimal("1"))
+        old = baker.make(
+            BudgetPeriodCounter,
+            user=user,
+            period="Daily",
+            period_start=timezone.localdate() - timedelta(days=500),
+        )
+
+        from Tracker.tasks import reconcile_budget_counters
+
+        reconcile_budget_counters(batch_size=1)
+        for period in BudgetCounterService.PERIODS:
+            assert self.spent(user, period) == Decimal("75")
+        assert not BudgetPeriodCounter.objects.filter(id=old.id).exists()
+
+
+@pytest.mark.django_db
+class TestCurrencyConversion:
+    def test_rate_matrix_serves_direct_and_inverse_rates(self):
+        from Tracker.currency import bump_rates_version
+        from Tracker.models import CurrencyExchangeRate
+        from Tracker.utils import convert_currency
+
+        CurrencyExchangeRate.objects.create(
+            base_currency="USD", target_currency="NGN", rate=Decimal("1500")
+        )
+        bump_rates_version()
+
+        assert convert_currency(2, "USD", "NGN") == pytest.approx(3000)
+        assert convert_currency(3000, "NGN", "USD") == pytest.approx(2)
+        assert convert_currency(10, "USD", "GBP") == 10
+
+    def test_conversions_reuse_loaded_matrix(self, django_assert_num_queries):
+        from Tracker.currency import bump_rates_version
+        from Tracker.models import CurrencyExchangeRate
+        from Tracker.utils import convert_currency
+
+        CurrencyExchangeRate.objects.create(
+            base_currency="USD", target_currency="EUR", rate=Decimal("0.9")
+        )
+        bump_rates_version()
+
+        with django_assert_num_queries(1):
+            for _ in range(20):
+                convert_currency(100, "USD", "EUR")
+                convert_currency(100, "EUR", "USD")
+
+    def test_bumping_version_reloads_matrix(self):
+        from Tracker.currency import bump_rates_version
+        from Tracker.models import CurrencyExchangeRate
+        from Tracker.utils import convert_currency
+
+        rate = CurrencyExchangeRate.objects.create(
+            base_currency="USD", target_currency="EUR", rate=Decimal("0.9")
+        )
+        bump_rates_version()
+        assert convert_currency(100, "USD", "EUR") == pytest.approx(90)
+
+        rate.rate = Decimal("0.8")
+        rate.save()
+        assert convert_currency(100, "USD", "EUR") == pytest.approx(90)
+
+        bump_rates_version()
+        assert convert_currency(100, "USD", "EUR") == pytest.approx(80)
+
+    def test_cross_rates_triangulate_through_pivot(self):
+        from Tracker.currency import bump_rates_version
+        from Tracker.models import CurrencyExchangeRate
+        from Tracker.utils import convert_currency
+
+        CurrencyExchangeRate.objects.create(
+            base_currency="USD", target_currency="NGN", rate=Decimal("1500")
+        )
+        CurrencyExchangeRate.objects.create(
+            base_currency="USD", target_currency="GBP", rate=Decimal("0.75")
+        )
+        bump_rates_version()
+
+        assert convert_currency(1500, "NGN", "GBP") == pytest.approx(0.75)
+        assert convert_currency(0.75, "GBP", "NGN") == pytest.approx(1500)
+
+    def test_build_cross_rates_covers_every_pair(self):
+        from Tracker.currency import build_cross_rates
+
+        table = build_cross_rates({"NGN": 1500, "EUR": 0.9, "GBP": 0.75})
+        assert len(table) == 4 * 3
+        assert table[("EUR", "GBP")] == pytest.approx(0.75 / 0.9)
+        assert table[("NGN", "USD")] == pytest.approx(1 / 1500)
+
+    def test_convert_many_matches_scalar_conversion(self):
+        from Tracker.currency import bump_rates_version, convert_many
+        from Tracker.models import CurrencyExchangeRate
+        from Tracker.utils import convert_currency
+
+        CurrencyExchangeRate.objects.create(
+            base_currency="USD", target_currency="NGN", rate=Decimal("1500")
+        )
+        bump_rates_version()
+        rows = [
+            {"total": Decimal("10"), "currency": "USD"},
+            {"total": Decimal("3000"), "currency": "NGN"},
+            {"total": None, "currency": "USD"},
+            {"total": Decimal("5"), "currency": "JPY"},
+        ]
+
+        expected = [
+            float(convert_currency(row["total"] or 0, row["currency"], "NGN"))
+            for row in rows
+        ]
+        assert convert_many(rows, "total", "currency", "NGN") == pytest.approx(expected)
+        assert convert_many(
+            rows, "total", "currency", "NGN", vectorize=True
+        ) == pytest.approx(expected)
+
+
+@pytest.mark.django_db
+class TestBaseAmountSnapshot:
+    def _usd_rate(self):
+        from Tracker.currency import bump_rates_version
+        from Tracker.models import CurrencyExchangeRate
+
+        CurrencyExchangeRate.objects.create(
+            base_currency="USD", target_currency="NGN", rate=Decimal("1500")
+        )
+        bump_rates_version()
+
+    def test_save_stores_amount_in_base_currency(self):
+        self._usd_rate()
+        user = baker.make(User)
+        txn = baker.make(
+            Transaction, user=user, type="Expense", amount=Decimal("10"), currency="USD"
+        )
+        assert txn.base_currency == "NGN"
+        assert txn.amount_base == Decimal("15000.00")
+        assert txn.exchange_rate == Decimal("1500")
+
+        txn.amount = Decimal("2")
+        txn.save(update_fields=["amount"])
+        txn.refresh_from_db()
+        assert txn.amount_base == Decimal("3000.00")
+
+    def test_sum_in_base_currency_falls_back_for_stale_rows(self):
+        from Tracker.currency import sum_in_base_currency
+
+        self._usd_rate()
+        user = baker.make(User)
+        baker.make(Transaction, user=user, amount=Decimal("10"), currency="USD")
+        baker.make(Transaction, user=user, amount=Decimal("500"), currency="NGN")
+        qs = Transaction.objects.filter(user=user)
+
+        assert sum_in_base_currency(qs, [], "NGN")[0]["total"] == pytest.approx(15500)
+        assert sum_in_base_currency(qs, [], "USD")[0]["total"] == pytest.approx(
+            10 + 500 / 1500
+        )
+
+    def test_rebase_after_base_currency_change(self):
+        self._usd_rate()
+        user = baker.make(User)
+        baker.make(Transaction, user=user, amount=Decimal("3000"), currency="NGN")
+        user.profile.base_currency = "USD"
+        user.profile.save()
+
+        from Tracker.services import TransactionService
+
+        assert TransactionService.rebase_transactions(user) == 1
+        txn = Transaction.objects.get(user=user)
+        assert txn.base_currency == "USD"
+        assert txn.amount_base == Decimal("2.00")
+        assert TransactionService.rebase_transactions(user) == 0
+
+
+@pytest.mark.django_db
+class TestHistoricalRates:
+    def _history(self):
+        from Tracker.currency import bump_rates_version
+        from Tracker.models import CurrencyExchangeRate, ExchangeRateHistory
+
+        CurrencyExchangeRate.objects.create(
+            base_currency="USD", target_currency="NGN", rate=Decimal("1500")
+        )
+        ExchangeRateHistory.objects.create(
+            base_currency="USD",
+            target_currency="NGN",
+            effective_date=date.today() - timedelta(days=400),
+            rate=Decimal("800"),
+        )
+        ExchangeRateHistory.objects.create(
+            base_currency="USD",
+            target_currency="NGN",
+            effective_date=date.today() - timedelta(days=40),
+            rate=Decimal("1500"),
+        )
+        bump_rates_version()
+
+    def test_past_transaction_uses_rate_in_effect_on_its_date(self):
+        from django.utils import timezone
+
+        self._history()
+        user = baker.make(User)
+        old = baker.make(
+            Transaction,
+            user=user,
+            amount=Decimal("10"),
+            currency="USD",
+            transaction_date=timezone.now() - timedelta(days=300),
+        )
+        new = baker.make(Transaction, user=user, amount=Decimal("10"), currency="USD")
+        assert old.amount_base == Decimal("8000.00")
+        assert new.amount_base == Decimal("15000.00")
+
+    def test_convert_buckets_joins_historical_rate_in_one_query(
+        self, django_assert_num_queries
+    ):
+        from django.db.models.functions import TruncMonth
+        from django.utils import timezone
+
+        from Tracker.currency import convert_buckets
+
+        self._history()
+        user = baker.make(User)
+        for days_ago in (300, 1):
+            baker.make(
+                Transaction,
+                user=user,
+                amount=Decimal("10"),
+                currency="USD",
+                transaction_date=timezone.now() - timedelta(days=days_ago),
+            )
+        qs = Transaction.objects.filter(user=user).annotate(
+            month=TruncMonth("transaction_date")
+        )
+
+        with django_assert_num_queries(1):
+            rows = convert_buckets(qs, ["month"], "NGN", rate_date="month")
+        assert sorted(row["total"] for row in rows) == pytest.approx([8000, 15000])
+
+
+class TestChartSeries:
+    def test_gap_filled_weekly_axis_buckets_by_monday(self):
+        from Tracker.charts import build_series
+
+        series = build_series(
+            [date(2025, 3, 5), date(2025, 3, 9), date(2025, 3, 17)],
+            [10, 5, 7],
+            date(2025, 3, 3),
+            date(2025, 3, 18),
+            "week",
+        )
+        assert series == {
+            "labels": ["Mar 03", "Mar 10", "Mar 17"],
+            "values": [15.0, 0.0, 7.0],
+        }
+
+    def test_sum_downsampling_keeps_every_bucket_and_the_tail(self):
+        from Tracker.charts import build_series
+
+        start = date(2015, 1, 1)
+        days = [start + timedelta(days=31 * i) for i in range(125)]
+        series = build_series(
+            days, [1] * len(days), start, days[-1], "month", max_points=60
+        )
+        assert len(series["labels"]) == len(series["values"]) == 60
+        assert sum(series["values"]) == len(days)
+        assert series["labels"][0] == "Jan 2015"
+
+    def test_lttb_keeps_endpoints_and_spikes(self):
+        from Tracker.charts import build_series
+
+        start = date(2024, 1, 1)
+        days = [start + timedelta(days=i) for i in range(365)]
+        amounts = [1.0] * 365
+        amounts[200] = 500.0
+        series = build_series(
+            days, amounts, start, days[-1], "day", max_points=30, downsample="lttb"
+        )
+        assert len(series["labels"]) == 30
+        assert series["labels"][0] == "Jan 01"
+        assert series["labels"][-1] == days[-1].strftime("%b %d")
+        assert 500.0 in series["values"]
@@ -0,0 +1,265 @@
+import pytest
+from decimal import Decimal
+
+from Tracker import tasks
+from Tracker.currency import get_rates_version
+from Tracker.models import CurrencyExchangeRate, ExchangeRateHistory
+
+
+class StubRatesResponse:
+    def __init__(self, rates):
+        self.rates = rates
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"result": "success", "conversion_rates": self.rates}
+
+
+@pytest.fixture
+def stub_rates_provider(monkeypatch):
+    monkeypatch.setenv("EXCHANGE_RATE_API_KEY", "test-key")
+
+    def install(rates):
+        monkeypatch.setattr(
+            tasks.requests, "get", lambda *args, **kwargs: StubRatesResponse(rates)
+        )
+
+    return install
+
+
+@pytest.mark.django_db
+class TestUpdateExchangeRates:
+    def test_writes_full_cross_rate_table(
+        self, stub_rates_provider, django_capture_on_commit_callbacks
+    ):
+        stub_rates_provider({"USD": 1, "NGN": 1500, "GBP": 0.75, "XYZ": 3})
+        version = get_rates_version()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = tasks.update_exchange_rates()
+
+        assert result.startswith("Updated 6 exchange rates and 6 history rows")
+        assert CurrencyExchangeRate.objects.count() == 6
+        assert ExchangeRateHistory.objects.count() == 6
+        ngn_gbp = CurrencyExchangeRate.objects.get(
+            base_currency="NGN", target_currency="GBP"
+        )
+        assert ngn_gbp.rate == pytest.approx(Decimal("0.0005"))
+        assert get_rates_version() == version + 1
+
+    def test_refresh_upserts_in_bulk(
+        self,
+        stub_rates_provider,
+        django_assert_max_num_queries,
+        django_capture_on_commit_callbacks,
+    ):
+        stub_rates_provider({"USD": 1, "NGN": 1500, "EUR": 0.9})
+        with django_capture_on_commit_callbacks(execute=True):
+            tasks.update_exchange_rates()
+
+        stub_rates_provider({"USD": 1, "NGN": 1600, "EUR": 0.9})
+        with django_assert_max_num_queries(6):
+            with django_capture_on_commit_callbacks(execute=True):
+                tasks.update_exchange_rates()
+
+        assert CurrencyExchangeRate.objects.count() == 6
+        assert ExchangeRateHistory.objects.count() == 6
+        assert CurrencyExchangeRate.objects.get(
+            base_currency="USD", target_currency="NGN"
+        ).rate == Decimal("1600")
+
+    def test_provider_failure_leaves_rates_untouched(self, monkeypatch):
+        monkeypatch.setenv("EXCHANGE_RATE_API_KEY", "test-key")
+
+        def fail(*args, **kwargs):
+            raise tasks.requests.ConnectionError("provider down")
+
+        monkeypatch.setattr(tasks.requests, "get", fail)
+        assert "provider down" in tasks.update_exchange_rates()
+        assert not CurrencyExchangeRate.objects.exists()
+
+
+@pytest.mark.django_db
+class TestDashboardStaleWhileRevalidate:
+    def test_expired_entry_is_served_stale_and_refreshed_in_background(
+        self, settings, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from model_bakery import baker
+        from rest_framework.test import APIClient
+
+        from Tracker.models import Transaction
+
+        settings.DASHBOARD_STALE_WHILE_REVALIDATE = True
+        cache.clear()
+        queued = []
+        monkeypatch.setattr(
+            tasks.refresh_dashboard_cache, "delay", lambda *args: queued.append(args)
+        )
+        user = get_user_model().objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        def dashboard():
+            return client.get("/api/v1/dashboard/overview/?period=1W").data["data"]
+
+        assert dashboard()["stale"] is False
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(Transaction, user=user, type="Income", amount=300)
+            tasks.invalidate_dashboard_cache(user.id)
+
+        stale = dashboard()
+        assert stale["stale"] is True
+        assert stale["overview"]["monthly_income"] == 0
+        dashboard()
+        assert queued == [(user.id, "1W", list(tasks.ALL_SECTIONS))]
+
+        tasks.refresh_dashboard_cache(*queued[0])
+        fresh = dashboard()
+        assert fresh["stale"] is False
+        assert fresh["overview"]["monthly_income"] == 300
+
+
+@pytest.mark.django_db
+class TestTransactionSideEffects:
+    def test_async_create_defers_limit_check_until_after_commit(
+        self, settings, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        from django.contrib.auth import get_user_model
+        from model_bakery import baker
+        from rest_framework.test import APIClient
+
+        from Tracker.models import Category, GeneralBudget
+
+        settings.TRANSACTION_SIDE_EFFECTS_ASYNC = True
+        queued = []
+        monkeypatch.setattr(
+            tasks.process_transaction_side_effects, "delay", queued.append
+        )
+        user = get_user_model().objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        baker.make(GeneralBudget, user=user, period="Monthly", amount=100)
+        cat = baker.make(Category, user=user, type="Expense")
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(
+                "/api/v1/transactions/",
+                {"party_name": "Shop", "amount": 30, "type": "Expense", "category": cat.id},
+                format="json",
+            )
+        txn_id = response.data["data"]["id"]
+        assert response.data["side_effects"] == "pending"
+        assert response.data["limit"] is None
+        assert queued == [txn_id]
+
+        url = f"/api/v1/transactions/{txn_id}/side_effects/"
+        assert client.get(url).data["data"] == {"status": "pending"}
+        tasks.process_transaction_side_effects(txn_id)
+        assert client.get(url).data["data"] == {
+            "status": "done",
+            "limit": "70.00 remaining to reach your Monthly Limit",
+            "savings_message": "You are making an Expense or add savings is False",
+        }
+
+
+@pytest.mark.django_db
+class TestBudgetEvaluation:
+    def make_user(self, monthly_spent):
+        from django.contrib.auth import get_user_model
+        from model_bakery import baker
+
+        from Tracker.models import Category, CategoryBudget, GeneralBudget, Transaction
+
+        user = baker.make(get_user_model())
+        category = baker.make(Category, user=user, type="Expense")
+        baker.make(GeneralBudget, user=user, period="Monthly", amount=Decimal("100"))
+        baker.make(
+            CategoryBudget,
+            user=user,
+            category=category,
+            period="Monthly",
+            amount=Decimal("200"),
+        )
+        baker.make(
+            Transaction,
+            user=user,
+            type="Expense",
+            category=category,
+            amount=monthly_spent,
+        )
+        return user
+
+    def test_records_each_crossed_threshold_once(self, monkeypatch):
+        from Tracker.models import BudgetAlert
+
+        monkeypatch.setattr(tasks.send_budget_alert_digests, "delay", lambda ids: None)
+        user = self.make_user(Decimal("85"))
+        tasks.evaluate_budgets()
+
+        alerts = BudgetAlert.objects.filter(user=user)
+        assert sorted(alerts.values_list("budget_type", "threshold")) == [
+            ("General", 50),
+            ("General", 80),
+        ]
+        tasks.evaluate_budgets()
+        assert alerts.count() == 2
+
+    def test_uncategorized_spending_counts_toward_general_budget_only(self):
+        from model_bakery import baker
+
+        from Tracker.models import BudgetAlert, Category, Transaction
+        from Tracker.services import BudgetAlertService
+
+        user = self.make_user(Decimal("60"))
+        other = baker.make(Category, user=user, type="Expense")
+        baker.make(Transaction, user=user, type="Expense", category=other, amount=5)
+        baker.make(Transaction, user=user, type="Expense", category=None, amount=10)
+        BudgetAlertService.evaluate([user.id])
+
+        # 60 + 5 + 10 against the general budget of 100; the uncategorized
+        # 10 must not replace that total whatever order the groups come in
+        alerts = BudgetAlert.objects.filter(user=user)
+        assert set(alerts.values_list("budget_type", "threshold", "spent")) == {
+            ("General", 50, Decimal("75.00"))
+        }
+
+    def test_query_count_does_not_grow_with_users(self, django_assert_num_queries):
+        from Tracker.services import BudgetAlertService
+
+        users = [self.make_user(Decimal("150")) for _ in range(4)]
+
+        # budgets x2, timezones, one rollup scan, recorded alerts, insert
+        with django_assert_num_queries(6):
+            alerts = BudgetAlertService.evaluate([user.id for user in users])
+        assert len(alerts) == 4 * 4
+
+    def test_digest_batches_pending_alerts_per_user(
+        self, mailoutbox, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        from Tracker.models import BudgetAlert
+
+        queued = []
+        monkeypatch.setattr(tasks.send_budget_alert_digests, "delay", queued.append)
+        heavy, light = self.make_user(Decimal("210")), self.make_user(Decimal("60"))
+        with django_capture_on_commit_callbacks(execute=True):
+            tasks.evaluate_budgets()
+        assert queued == [sorted([heavy.id, light.id])]
+        assert not mailoutbox
+
+        tasks.send_budget_alert_digests(queued[0])
+
+        bodies = {mail.to[0]: mail.body for mail in mailoutbox}
+        assert len(mailoutbox) == 2
+        # Only the highest crossing of each budget is reported
+        assert "100% of your Monthly budget used (210.00 of 200.00)" in bodies[heavy.email]
+        assert "50% of your" not in bodies[heavy.email]
+        assert "50% of your Monthly budget used (60.00 of 100.00)" in bodies[light.email]
+        assert not BudgetAlert.objects.filter(notified_at__isnull=True).exists()
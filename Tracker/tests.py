@@ -5,7 +5,7 @@ from model_bakery import baker
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from Tracker.models import Category, GeneralBudget, SavingPlan, Transaction
+from Tracker.models import Category, GeneralBudget, ImportJob, SavingPlan, Transaction
 from Tracker.serializers import CategorySerializer, TransactionSerializer
 
 User = get_user_model()
@@ -146,6 +146,89 @@ class TestDashboardAPI:
         assert response.data["status"] == "success"
         assert "overview" in response.data["data"]
 
+    def test_dashboard_totals_come_from_rollup(self):
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        cat = baker.make(Category, user=user, type="Expense", name="Food")
+        baker.make(Transaction, user=user, type="Income", amount=5000)
+        baker.make(Transaction, user=user, type="Expense", amount=2000, category=cat)
+        baker.make(Transaction, user=user, type="Expense", amount=700, is_deleted=True)
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        overview = client.get("/api/v1/dashboard/overview/?period=all").data["data"][
+            "overview"
+        ]
+        assert overview["monthly_income"] == 5000
+        assert overview["monthly_expenses"] == 2000
+        assert overview["total_transactions"] == 2
+        assert overview["expense_distribution"] == [{"name": "Food", "amount": 2000}]
+        assert sum(overview["expense_chart"]["values"]) == 2000
+
+    def test_cold_dashboard_runs_fixed_number_of_queries(
+        self, django_assert_max_num_queries
+    ):
+        from django.core.cache import cache
+
+        from Tracker.currency import get_rate_matrix
+
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        baker.make(GeneralBudget, user=user, period="Monthly", amount=10000)
+        for name in ("Food", "Rent", "Fuel"):
+            cat = baker.make(Category, user=user, type="Expense", name=name)
+            baker.make(Transaction, user=user, type="Expense", amount=10, category=cat, _quantity=4)
+        baker.make(Transaction, user=user, type="Income", amount=500, _quantity=3)
+        get_rate_matrix()
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        for period in ("1W", "all"):
+            cache.clear()
+            # profile, totals, grouped expenses, budget, latest transactions
+            with django_assert_max_num_queries(5):
+                overview = client.get(
+                    f"/api/v1/dashboard/overview/?period={period}"
+                ).data["data"]["overview"]
+            assert overview["monthly_expenses"] == 120
+            assert overview["total_transactions"] == 15
+
+    def test_writes_invalidate_every_cached_period(
+        self, django_capture_on_commit_callbacks
+    ):
+        from django.core.cache import cache
+
+        cache.clear()
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        cat = baker.make(Category, user=user, type="Expense")
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        def expenses(period):
+            response = client.get(f"/api/v1/dashboard/overview/?period={period}")
+            return response.data["data"]["overview"]["monthly_expenses"]
+
+        assert expenses("1W") == 0
+        assert expenses("all") == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(
+                "/api/v1/transactions/",
+                {"party_name": "Shop", "amount": 40, "type": "Expense", "category": cat.id},
+                format="json",
+            )
+        assert expenses("1W") == 40
+        assert expenses("all") == 40
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.delete(f"/api/v1/transactions/{response.data['data']['id']}/")
+        assert expenses("1W") == 0
+        assert expenses("all") == 0
+
 
 @pytest.mark.django_db
 class TestSavingPlanAPI:
@@ -166,3 +249,846 @@ class TestSavingPlanAPI:
 
         response = client.get("/api/v1/check/saving/plan/status/")
         assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestDailySummaryRollup:
+    def _totals(self, user):
+        from Tracker.models import DailyUserSummary
+
+        return DailyUserSummary.objects.filter(user=user).aggregate(
+            total=Sum("total"), count=Sum("count")
+        )
+
+    def test_rollup_follows_transaction_lifecycle(self):
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        txn = baker.make(Transaction, user=user, type="Expense", amount=100)
+        other = baker.make(Transaction, user=user, type="Expense", amount=50)
+        assert self._totals(user) == {"total": 150, "count": 2}
+
+        txn.amount = 120
+        txn.save()
+        assert self._totals(user) == {"total": 170, "count": 2}
+
+        client.delete(f"/api/v1/transactions/{txn.id}/")
+        assert self._totals(user) == {"total": 50, "count": 1}
+
+        client.post(f"/api/v1/transactions/{txn.id}/restore/")
+        assert self._totals(user) == {"total": 170, "count": 2}
+
+        client.post(
+            "/api/v1/transactions/bulk_delete/",
+            {"ids": [txn.id, other.id]},
+            format="json",
+        )
+        assert self._totals(user) == {"total": 0, "count": 0}
+
+    def test_rebuild_matches_incremental_rollup(self):
+        from Tracker.models import DailyUserSummary
+        from Tracker.services import DailySummaryService
+
+        user = baker.make(User)
+        cat = baker.make(Category, user=user, type="Expense")
+        baker.make(Transaction, user=user, type="Expense", amount=10, category=cat, _quantity=3)
+        baker.make(Transaction, user=user, type="Income", amount=99)
+        baker.make(Transaction, user=user, type="Income", amount=5, is_deleted=True)
+
+        def snapshot():
+            return sorted(
+                DailyUserSummary.objects.filter(user=user, count__gt=0).values_list(
+                    "day", "type", "category_id", "currency", "total", "count"
+                )
+            )
+
+        incremental = snapshot()
+        DailySummaryService.rebuild(user)
+        assert snapshot() == incremental
+
+    def test_cascaded_deletes_leave_the_rollup(self, django_capture_on_commit_callbacks):
+        from Tracker.models import DailyUserSummary
+
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        plan = baker.make(SavingPlan, user=user, status="Active")
+        cat = baker.make(Category, user=user, type="Expense")
+        baker.make(Transaction, user=user, type="Income", amount=100, savings=plan)
+        baker.make(Transaction, user=user, type="Expense", amount=30, category=cat)
+        baker.make(Transaction, user=user, type="Expense", amount=20)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.delete(f"/api/v1/saving-plans/{plan.id}/")
+        overview = client.get("/api/v1/dashboard/overview/").data["data"]["overview"]
+        assert overview["monthly_income"] == 0
+        assert self._totals(user) == {"total": 50, "count": 2}
+
+        category_id = cat.id
+        cat.delete()
+        assert self._totals(user) == {"total": 20, "count": 1}
+        assert not DailyUserSummary.objects.filter(category_id=category_id).exists()
+
+    def test_one_row_per_key_under_concurrent_first_writes(self):
+        from django.db import IntegrityError, transaction
+
+        from Tracker.models import DailyUserSummary
+
+        txn = baker.make(Transaction, type="Expense", amount=10, category=None)
+        row = DailyUserSummary.objects.get(user=txn.user)
+        duplicate = dict(
+            user_id=row.user_id, day=row.day, type=row.type, category=None,
+            currency=row.currency,
+        )
+        # A second first-write for the same day cannot insert its own row
+        with pytest.raises(IntegrityError), transaction.atomic():
+            DailyUserSummary.objects.create(**duplicate)
+
+
+@pytest.mark.django_db
+class TestUserTimezoneBucketing:
+    def _lagos_user(self):
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        user.profile.timezone = "Africa/Lagos"
+        user.profile.save()
+        return user
+
+    def _just_after_local_midnight(self):
+        from datetime import datetime, time, timedelta
+        from zoneinfo import ZoneInfo
+
+        from django.utils import timezone
+
+        lagos = ZoneInfo("Africa/Lagos")
+        midnight = datetime.combine(timezone.localdate(timezone=lagos), time.min, tzinfo=lagos)
+        # 00:30 in Lagos is 23:30 of the previous day in UTC
+        return midnight + timedelta(minutes=30)
+
+    def test_rollup_day_follows_user_timezone(self):
+        from Tracker.models import DailyUserSummary
+        from Tracker.services import DailySummaryService
+
+        user = self._lagos_user()
+        when = self._just_after_local_midnight()
+        baker.make(Transaction, user=user, type="Expense", amount=10, transaction_date=when)
+
+        days = list(DailyUserSummary.objects.filter(user=user).values_list("day", flat=True))
+        assert days == [when.date()]
+        DailySummaryService.rebuild(user)
+        assert list(DailyUserSummary.objects.filter(user=user).values_list("day", flat=True)) == days
+
+    def test_daily_budget_counts_local_day(self):
+        from Tracker.services import BudgetService
+
+        user = self._lagos_user()
+        baker.make(GeneralBudget, user=user, period="Daily", amount=100)
+        baker.make(
+            Transaction, user=user, type="Expense", amount=40,
+            transaction_date=self._just_after_local_midnight(),
+        )
+        assert BudgetService.get_general_limit_status(user) == (
+            "60.00 remaining to reach your Daily Limit"
+        )
+
+
+@pytest.mark.django_db
+class TestDashboardSingleFlight:
+    SECTIONS = ("base_currency", "latest_transactions")
+
+    def _locked_out(self, user):
+        from django.core.cache import cache
+
+        from Tracker.cache import dashboard_compute_key
+
+        cache.clear()
+        cache.add(dashboard_compute_key(user.id, "1M", *self.SECTIONS), "other-request")
+
+    def test_waiter_returns_leaders_result_without_querying(
+        self, monkeypatch, django_assert_num_queries
+    ):
+        from django.core.cache import cache
+
+        from Tracker import cache as dashboard_cache
+        from Tracker.dashboard import _section_keys, get_dashboard
+
+        user = baker.make(User)
+        self._locked_out(user)
+        keys = _section_keys(user.id, "1M", self.SECTIONS)
+        leader = {keys["base_currency"]: "USD", keys["latest_transactions"]: []}
+        # The leader finishes while we are polling
+        monkeypatch.setattr(dashboard_cache.time, "sleep", lambda _: cache.set_many(leader))
+        with django_assert_num_queries(0):
+            data, stale = get_dashboard(user, "1M", ("latest_transactions",))
+        assert (data, stale) == ({"base_currency": "USD", "latest_transactions": []}, False)
+
+    def test_waiter_falls_back_to_last_value_on_timeout(
+        self, monkeypatch, django_assert_num_queries
+    ):
+        from django.core.cache import cache
+
+        from Tracker import cache as dashboard_cache
+        from Tracker.dashboard import get_dashboard
+
+        user = baker.make(User)
+        self._locked_out(user)
+        for section, value in (("base_currency", "EUR"), ("latest_transactions", [1])):
+            cache.set(dashboard_cache.dashboard_stale_key(user.id, section, "1M"), value)
+        monkeypatch.setattr(dashboard_cache, "COMPUTE_WAIT", 0)
+        with django_assert_num_queries(0):
+            data, stale = get_dashboard(user, "1M", ("latest_transactions",))
+        assert (data, stale) == ({"base_currency": "EUR", "latest_transactions": [1]}, True)
+
+
+@pytest.mark.django_db
+class TestDashboardBundle:
+    def test_bundle_matches_per_period_payloads(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from Tracker.dashboard import (
+            ALL_SECTIONS,
+            PERIODS,
+            build_dashboard_bundle,
+            build_sections,
+        )
+
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        baker.make(GeneralBudget, user=user, period="Monthly", amount=10000)
+        food = baker.make(Category, user=user, type="Expense", name="Food")
+        rent = baker.make(Category, user=user, type="Expense", name="Rent")
+        now = timezone.now()
+        for days_ago, amount, category in [
+            (0, 10, food), (3, 20, rent), (20, 30, food), (80, 40, rent), (400, 50, food),
+        ]:
+            baker.make(
+                Transaction, user=user, type="Expense", amount=amount,
+                category=category, transaction_date=now - timedelta(days=days_ago),
+            )
+        baker.make(Transaction, user=user, type="Income", amount=500, transaction_date=now)
+        baker.make(Transaction, user=user, type="Expense", amount=7, transaction_date=now)
+
+        bundle = build_dashboard_bundle(user)
+        for period in PERIODS:
+            assert bundle[period] == build_sections(user, period, ALL_SECTIONS)
+
+    def test_switching_periods_after_first_load_hits_cache(
+        self, settings, django_assert_max_num_queries, django_assert_num_queries
+    ):
+        from django.core.cache import cache
+
+        settings.DASHBOARD_BUNDLE_PERIODS = True
+        cache.clear()
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        baker.make(Transaction, user=user, type="Expense", amount=25)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        with django_assert_max_num_queries(4):
+            client.get("/api/v1/dashboard/overview/?period=1M")
+        for period in ("1W", "3M", "1Y", "all"):
+            with django_assert_num_queries(0):
+                data = client.get(f"/api/v1/dashboard/overview/?period={period}").data
+            assert data["data"]["overview"]["monthly_expenses"] == 25
+
+
+@pytest.mark.django_db
+class TestDashboardSections:
+    def test_sections_are_computed_and_invalidated_independently(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        from django.core.cache import cache
+
+        cache.clear()
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        cat = baker.make(Category, user=user, type="Expense", name="Food")
+        baker.make(Transaction, user=user, type="Expense", amount=80, category=cat)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        def chart():
+            return client.get("/api/v1/dashboard/overview/?sections=expense_chart").data
+
+        data = chart()["data"]
+        assert set(data) == {"base_currency", "overview", "stale"}
+        assert set(data["overview"]) == {"expense_chart"}
+        assert sum(data["overview"]["expense_chart"]["values"]) == 80
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                "/api/v1/general-budgets/",
+                {"name": "Monthly", "amount": 1000, "period": "Monthly"},
+                format="json",
+            )
+        with django_assert_num_queries(0):
+            chart()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                "/api/v1/transactions/",
+                {"party_name": "Shop", "amount": 20, "type": "Expense", "category": cat.id},
+                format="json",
+            )
+        assert sum(chart()["data"]["overview"]["expense_chart"]["values"]) == 100
+
+    def test_unknown_section_is_rejected(self):
+        user = baker.make(User)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get("/api/v1/dashboard/overview/?sections=totals,nope")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestCategoryBudgetStatus:
+    def test_status_for_every_budget_in_grouped_queries(self, django_assert_max_num_queries):
+        from Tracker.models import CategoryBudget
+
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        food = baker.make(Category, user=user, type="Expense", name="Food")
+        rent = baker.make(Category, user=user, type="Expense", name="Rent")
+        fuel = baker.make(Category, user=user, type="Expense", name="Fuel")
+        baker.make(CategoryBudget, user=user, category=food, name="Food", amount=200, period="Monthly")
+        baker.make(CategoryBudget, user=user, category=rent, name="Rent", amount=1000, period="Monthly")
+        baker.make(CategoryBudget, user=user, category=fuel, name="Fuel", amount=50, period="Daily")
+        baker.make(Transaction, user=user, type="Expense", amount=50, category=food, _quantity=2)
+        baker.make(Transaction, user=user, type="Expense", amount=80, category=fuel)
+        baker.make(Transaction, user=user, type="Expense", amount=999, category=food, is_deleted=True)
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        # budgets, then one aggregation per distinct period
+        with django_assert_max_num_queries(3):
+            response = client.get("/api/v1/category-budgets/status/")
+        assert response.status_code == status.HTTP_200_OK
+        statuses = {row["name"]: row for row in response.data["data"]["budgets"]}
+        assert statuses["Food"]["spent"] == 100
+        assert statuses["Food"]["remaining"] == 100
+        assert statuses["Food"]["percentage"] == 50
+        assert statuses["Rent"]["spent"] == 0
+        assert statuses["Fuel"]["remaining"] == 0
+        assert statuses["Fuel"]["percentage"] == 160
+
+
+@pytest.mark.django_db
+class TestTransactionCursorPagination:
+    def walk(self, client, url):
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert "count" not in response.data
+            seen.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+        return seen, response.data["previous"]
+
+    def test_cursor_pages_match_ordering_without_count(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        now = timezone.now()
+        # Shared dates and NULLs exercise the id tie-break and the NULL
+        # segment across page boundaries
+        for i in range(45):
+            baker.make(
+                Transaction,
+                user=user,
+                type="Expense",
+                amount=i % 7,
+                transaction_date=now - timedelta(days=i // 3) if i % 10 else None,
+            )
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        expected = list(
+            Transaction.objects.filter(user=user)
+            .order_by("-transaction_date", "-id")
+            .values_list("id", flat=True)
+        )
+        seen, _ = self.walk(
+            client, "/api/v1/transactions/?pagination=cursor&ordering=transaction_date"
+        )
+        assert seen == expected[::-1]
+        seen, previous = self.walk(client, "/api/v1/transactions/?pagination=cursor")
+        assert seen == expected
+
+        # Following previous from the last page walks back in the same order
+        back = []
+        while previous:
+            response = client.get(previous)
+            back = [row["id"] for row in response.data["results"]] + back
+            previous = response.data["previous"]
+        assert back == expected[:40]
+
+        seen, _ = self.walk(
+            client, "/api/v1/transactions/?pagination=cursor&ordering=amount"
+        )
+        assert seen == list(
+            Transaction.objects.filter(user=user)
+            .order_by("amount", "id")
+            .values_list("id", flat=True)
+        )
+
+    def test_page_number_mode_is_unchanged_and_bad_cursor_is_404(self):
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        baker.make(Transaction, user=user, type="Expense", _quantity=3)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get("/api/v1/transactions/?page=1")
+        assert response.data["count"] == 3
+        response = client.get("/api/v1/transactions/?cursor=garbage")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cursor_seek_uses_user_date_index(self):
+        from django.db import connection
+        from django.utils import timezone
+
+        from Tracker.pagination import HybridPagination
+
+        if connection.vendor != "sqlite":
+            pytest.skip("plan text asserted for SQLite")
+        paginator = HybridPagination()
+        paginator.field = "transaction_date"
+        seek = paginator.seek((timezone.now(), 10), True, False)[0]
+        index = next(
+            index.name
+            for index in Transaction._meta.indexes
+            if index.fields == ["user", "transaction_date"]
+        )
+        plan = (
+            Transaction.objects.filter(user_id=1, is_deleted=False)
+            .filter(seek)
+            .order_by(*paginator.order_by(True))
+            .explain()
+        )
+        assert f"USING INDEX {index} (user_id=? AND transaction_date<?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.django_db
+class TestTransactionSearch:
+    def test_search_uses_index_and_follows_writes(self):
+        from Tracker.search import FTS5, search_backend, search_transactions
+
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        coffee = baker.make(
+            Transaction, user=user, type="Expense", party_name="Coffee Corner",
+            notes="coffee and coffee beans",
+        )
+        lunch = baker.make(
+            Transaction, user=user, type="Expense", party_name="Lunch spot",
+            notes="sandwich with coffee",
+        )
+        baker.make(Transaction, user=user, type="Expense", party_name="Fuel")
+
+        assert search_backend() == FTS5
+        queryset = Transaction.objects.filter(user=user)
+        ranked = search_transactions(queryset, "cof").order_by("-rank")
+        assert list(ranked) == [coffee, lunch]
+        # Punctuation cannot break out into FTS5 query syntax
+        assert list(search_transactions(queryset, 'sandw"*')) == [lunch]
+
+        lunch.notes = "sandwich"
+        lunch.save()
+        assert list(search_transactions(queryset, "coffee")) == [coffee]
+        Transaction.objects.filter(id=coffee.id).update(party_name="Tea house", notes="")
+        assert not search_transactions(queryset, "coffee").exists()
+
+    def test_rank_follows_the_queryset_alias_when_nested(self):
+        from django.db.models import OuterRef, Subquery
+
+        from Tracker.search import search_transactions
+
+        user = baker.make(User)
+        coffee = baker.make(Transaction, user=user, party_name="Coffee", notes="coffee")
+        lunch = baker.make(Transaction, user=user, party_name="Lunch", notes="coffee")
+        fuel = baker.make(Transaction, user=user, party_name="Fuel")
+        direct = dict(
+            search_transactions(Transaction.objects.filter(user=user), "coffee")
+            .values_list("id", "rank")
+        )
+
+        ranks = dict(
+            Transaction.objects.filter(user=user)
+            .annotate(
+                nested=Subquery(
+                    search_transactions(
+                        Transaction.objects.filter(pk=OuterRef("pk")), "coffee"
+                    ).values("rank")[:1]
+                )
+            )
+            .values_list("id", "nested")
+        )
+        assert ranks == {coffee.id: direct[coffee.id], lunch.id: direct[lunch.id], fuel.id: None}
+        assert direct[coffee.id] > direct[lunch.id]
+
+    def test_search_api_ranks_and_pages_by_cursor(self):
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        for i in range(25):
+            baker.make(
+                Transaction, user=user, type="Expense", party_name="Market",
+                notes=" ".join(["market"] * (i % 6)),
+            )
+        baker.make(Transaction, user=user, type="Expense", party_name="Cinema")
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        from Tracker.search import search_transactions
+
+        expected = list(
+            search_transactions(Transaction.objects.filter(user=user), "market")
+            .order_by("-rank", "-id")
+            .values_list("id", flat=True)
+        )
+        response = client.get("/api/v1/transactions/?search=market&ordering=-rank")
+        assert response.data["count"] == 25
+
+        url = "/api/v1/transactions/?search=market&ordering=-rank&pagination=cursor"
+        seen = []
+        while url:
+            response = client.get(url)
+            seen.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+        assert seen == expected
+
+        # Without a search there is no rank to order by, in either mode
+        for mode in ("page", "cursor"):
+            for ordering in ("rank", "-rank"):
+                response = client.get(
+                    f"/api/v1/transactions/?ordering={ordering}&pagination={mode}"
+                )
+                assert response.status_code == status.HTTP_200_OK
+                assert len(response.data["results"]) == 20
+
+
+@pytest.mark.django_db
+class TestTransactionBulkCreate:
+    def test_bulk_create_validates_with_prefetches_and_reports_row_errors(
+        self, django_assert_max_num_queries
+    ):
+        from Tracker.models import DailyUserSummary
+
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        other = User.objects.create_user(
+            email="other@example.com", username="otheruser", password="pass123"
+        )
+        food = baker.make(Category, user=user, type="Expense")
+        foreign = baker.make(Category, user=other, type="Expense")
+        plan = baker.make(
+            SavingPlan, user=user, status="Active",
+            savings_amount=1000, savings_reached_amount=0,
+        )
+        rows = [
+            {"party_name": f"Shop {i}", "amount": 10, "type": "Expense", "category": food.id}
+            for i in range(200)
+        ]
+        rows += [
+            {"amount": 500, "type": "Income", "add_savings": True,
+             "savings_percentage": 10, "savings": plan.id},
+            {"amount": 300, "type": "Income", "add_savings": True,
+             "savings_percentage": 10, "savings": plan.id},
+            {"amount": 5, "type": "Expense", "category": foreign.id},
+            {"amount": "abc", "type": "Expense"},
+        ]
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        # The query count does not grow with the number of rows
+        with django_assert_max_num_queries(40):
+            response = client.post(
+                "/api/v1/transactions/bulk_create/", {"transactions": rows}, format="json"
+            )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["created_count"] == 202
+        assert [error["index"] for error in response.data["errors"]] == [202, 203]
+        assert response.data["errors"][0]["errors"]["category"] == ["Category does not exist"]
+        assert response.data["savings_messages"] == [
+            f"{plan.name} saving goal remaining 920.00 to be completed"
+        ]
+
+        plan.refresh_from_db()
+        assert plan.savings_reached_amount == 80
+        assert Transaction.objects.filter(user=user).count() == 202
+        rollup = DailyUserSummary.objects.filter(user=user, type="Expense").aggregate(
+            total=Sum("total")
+        )
+        assert rollup["total"] == 2000
+
+    def test_bulk_create_with_no_valid_rows_is_rejected(self):
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(
+            "/api/v1/transactions/bulk_create/",
+            {"transactions": [{"amount": 5}]},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["errors"][0]["errors"]["type"]
+
+
+@pytest.mark.django_db
+class TestTransactionImport:
+    def upload(self, client, name, content, **extra):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        return client.post(
+            "/api/v1/transactions/import/",
+            {"file": SimpleUploadedFile(name, content.encode()), **extra},
+            format="multipart",
+        )
+
+    @pytest.fixture
+    def client_user(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client, user
+
+    def test_csv_import_maps_categories_dedupes_and_reports_errors(
+        self, client_user, tmp_path
+    ):
+        from datetime import datetime, timezone as dt_timezone
+
+        client, user = client_user
+        food = baker.make(Category, user=user, type="Expense", name="Groceries", tag="food")
+        baker.make(
+            Transaction, user=user, type="Expense", amount=12, party_name="Shoprite",
+            transaction_date=datetime(2025, 3, 1, 10, tzinfo=dt_timezone.utc),
+        )
+        content = (
+            "Date,Description,Amount,Category,Notes\n"
+            "2025-03-01,Shoprite,-12.00,food,already imported\n"
+            '2025-03-02,"Mama Put, Yaba",-4.50,Groceries,"line one\nline two"\n'
+            "2025-03-02,Mama Put,-4.50,,\n"
+            "2025-03-03,Salary,\"1,500.00\",,\n"
+            "not a date,Broken,-1,,\n"
+        )
+        response = self.upload(client, "statement.csv", content)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        job = response.data["data"]
+        assert job["status"] == "Completed"
+        assert (job["processed_rows"], job["created_count"]) == (5, 3)
+        assert (job["duplicate_count"], job["error_count"]) == (1, 1)
+        assert job["errors"][0]["line"] == 7
+
+        imported = Transaction.objects.filter(user=user, created_at__gt=job["created_at"])
+        mama = imported.filter(party_name="Mama Put, Yaba").get()
+        assert mama.category == food and mama.notes == "line one\nline two"
+        salary = imported.get(party_name="Salary")
+        assert (salary.type, salary.amount) == ("Income", 1500)
+
+        status_response = client.get(f"/api/v1/transactions/import/{job['id']}/")
+        assert status_response.data["data"]["created_count"] == 3
+        # The statement is not kept once the job has finished
+        assert not ImportJob.objects.get(id=job["id"]).file
+        assert not any((tmp_path / "imports").iterdir())
+
+    def test_ofx_and_qif_parse_to_the_same_rows(self, client_user):
+        from decimal import Decimal
+
+        client, user = client_user
+        ofx = (
+            "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>\n"
+            "<CURDEF>USD\n<BANKTRANLIST>\n"
+            "<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20250304120000[-5:EST]\n"
+            "<TRNAMT>-25.10\n<FITID>1\n<NAME>Fuel Station\n<MEMO>Pump 4\n</STMTTRN>\n"
+            "<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20250305\n"
+            "<TRNAMT>100.00\n<FITID>2\n<NAME>Refund\n</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        )
+        qif = (
+            "!Type:Bank\nD3/4'25\nT-25.10\nPFuel Station\nMPump 4\n^\n"
+            "D3/5'25\nT100.00\nPRefund\n^\n"
+        )
+        self.upload(client, "bank.ofx", ofx)
+        rows = list(
+            Transaction.objects.filter(user=user)
+            .order_by("transaction_date")
+            .values_list("party_name", "type", "amount", "currency", "notes")
+        )
+        assert rows == [
+            ("Fuel Station", "Expense", Decimal("25.10"), "USD", "Pump 4"),
+            ("Refund", "Income", 100, "USD", None),
+        ]
+        # The same statement as QIF is entirely duplicates of the OFX import
+        response = self.upload(client, "bank.qif", qif)
+        assert response.data["data"]["duplicate_count"] == 2
+        assert response.data["data"]["created_count"] == 0
+
+    def test_large_file_is_queued_as_a_job(
+        self, client_user, settings, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        from Tracker import tasks
+
+        client, user = client_user
+        queued = []
+        monkeypatch.setattr(tasks.import_transactions, "delay", queued.append)
+        settings.TRANSACTION_IMPORT_SYNC_MAX_BYTES = 10
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.upload(
+                client, "statement.csv", "date,amount,payee\n2025-01-01,-3,Bus\n"
+            )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.data["data"]["id"]
+        assert queued == [job_id]
+        assert ImportJob.objects.get(id=job_id).status == "Pending"
+
+        tasks.import_transactions(job_id)
+        response = client.get(f"/api/v1/transactions/import/{job_id}/")
+        assert response.data["data"]["status"] == "Completed"
+        assert response.data["data"]["created_count"] == 1
+
+    def test_failed_sync_import_is_an_error(self, client_user):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        client, user = client_user
+        response = client.post(
+            "/api/v1/transactions/import/",
+            {"file": SimpleUploadedFile("statement.csv", b"date,amount\n\xff\xfe,1\n")},
+            format="multipart",
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["message"] == "File is not valid UTF-8 text"
+        assert ImportJob.objects.get(user=user).status == "Failed"
+
+
+@pytest.mark.django_db
+class TestTransactionExport:
+    @pytest.fixture
+    def client_user(self):
+        user = User.objects.create_user(
+            email="test@example.com", username="testuser", password="pass123"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        baker.make(
+            Transaction, user=user, type="Expense", amount=12.5,
+            party_name='Mama Put, "Yaba"', notes="line one\nline two",
+        )
+        baker.make(Transaction, user=user, type="Income", amount=100, notes=None)
+        return client, user
+
+    def test_csv_quotes_commas_and_newlines(self, client_user):
+        import csv
+        import io
+
+        client, _ = client_user
+        for url in ("/api/v1/transactions/export/", "/api/v1/transactions/export_csv/"):
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert response["Content-Type"] == "text/csv"
+            body = b"".join(response.streaming_content).decode()
+            rows = list(csv.reader(io.StringIO(body)))
+            assert rows[0][:4] == ["id", "date", "type", "party"]
+            assert len(rows) == 3
+            expense = next(row for row in rows if row[2] == "Expense")
+            assert expense[3] == 'Mama Put, "Yaba"'
+            assert expense[4] == "12.50"
+            assert expense[7] == "line one\nline two"
+
+    def test_csv_streams_in_chunks_through_one_buffer(self, client_user):
+        from Tracker.exporters import export_transactions
+
+        _, user = client_user
+        baker.make(Transaction, user=user, type="Expense", amount=1, _quantity=3)
+        chunks, _, filename = export_transactions(
+            Transaction.objects.filter(user=user), chunk_rows=2
+        )
+        chunks = list(chunks)
+        assert filename == "transactions.csv"
+        # Header + first 2 rows, then 2 rows, then the last one
+        assert [chunk.count(b"\r\n") for chunk in chunks] == [3, 2, 1]
+
+    def test_gzip_and_ndjson(self, client_user):
+        import gzip
+        import json
+
+        client, _ = client_user
+        response = client.get(
+            "/api/v1/transactions/export/", {"output": "ndjson", "compress": "gzip"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/gzip"
+        assert 'filename="transactions.ndjson.gz"' in response["Content-Disposition"]
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        records = [json.loads(line) for line in lines]
+        assert len(records) == 2
+        expense = next(record for record in records if record["type"] == "Expense")
+        assert expense["amount"] == "12.50"
+        assert expense["notes"] == "line one\nline two"
+        income = next(record for record in records if record["type"] == "Income")
+        assert income["notes"] == ""
+
+    def test_rejects_unknown_output(self, client_user):
+        client, _ = client_user
+        response = client.get("/api/v1/transactions/export/", {"output": "xlsx"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.get("/api/v1/transactions/export/", {"compress": "zip"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_parquet(self, client_user):
+        import io
+        from decimal import Decimal
+
+        import pyarrow.parquet as pq
+
+        from Tracker.exporters import export_transactions
+
+        client, user = client_user
+        response = client.get("/api/v1/transactions/export/", {"output": "parquet"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/vnd.apache.parquet"
+        table = pq.read_table(io.BytesIO(b"".join(response.streaming_content)))
+        rows = sorted(table.to_pylist(), key=lambda row: row["type"])
+        assert [row["type"] for row in rows] == ["Expense", "Income"]
+        assert rows[0]["amount"] == Decimal("12.50")
+        assert rows[0]["party"] == 'Mama Put, "Yaba"'
+        assert rows[0]["notes"] == "line one\nline two"
+        assert rows[1]["notes"] is None
+        assert rows[0]["date"] is not None
+
+        # One row group per chunk, streamed through the sink as it is written
+        baker.make(Transaction, user=user, type="Expense", amount=1, _quantity=3)
+        chunks, _, _ = export_transactions(
+            Transaction.objects.filter(user=user), output="parquet", chunk_rows=2
+        )
+        chunks = list(chunks)
+        assert len([chunk for chunk in chunks if chunk]) > 1
+        parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+        assert parquet.metadata.num_rows == 5
+        assert parquet.num_row_groups == 3
@@ -5,6 +5,7 @@ import json
 import base64
 import re
 from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.response import Response
@@ -35,7 +36,7 @@ def create_error_response(message, status_code=status.HTTP_400_BAD_REQUEST):
     return Response(data=response, status=status_code)
 
 
-def create_transaction_response(serializer_data, limit_message, savings_message,recurring_message):
+def create_transaction_response(serializer_data, limit_message, savings_message,recurring_message, side_effects=None):
     """
     Utility function to create standardized transaction response
     """
@@ -47,6 +48,8 @@ def create_transaction_response(serializer_data, limit_message, savings_message,
         'savings_message': savings_message,
         'recurring_message':recurring_message
     }
+    if side_effects is not None:
+        response['side_effects'] = side_effects
     return Response(data=response, status=status.HTTP_201_CREATED)
 
 
@@ -83,22 +86,54 @@ def validate_saving_plan_exists(savings_id, user):
 
 
 def convert_currency(amount, from_currency, to_currency):
+    """
+    Utility function to convert an amount between currencies using the
+    in-process rate matrix (see Tracker.currency)
+    """
     if from_currency == to_currency or not amount:
         return amount
-    from Tracker.models import CurrencyExchangeRate
+    from Tracker.currency import get_rate
+
+    rate = get_rate(from_currency, to_currency)
+    if rate is None:
+        return amount
+    return float(amount) * rate
+
+
+def get_timezone(name):
+    """
+    Utility function to get the ZoneInfo of a timezone name, UTC when the
+    name is empty or unknown
+    """
     try:
-        rate_obj = CurrencyExchangeRate.objects.get(
-            base_currency=from_currency, target_currency=to_currency
-        )
-        return float(amount) * float(rate_obj.rate)
-    except CurrencyExchangeRate.DoesNotExist:
-        try:
-            rate_obj = CurrencyExchangeRate.objects.get(
-                base_currency=to_currency, target_currency=from_currency
-            )
-            return float(amount) / float(rate_obj.rate)
-        except CurrencyExchangeRate.DoesNotExist:
-            return amount
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def get_user_timezone(user):
+    """
+    Utility function to get the ZoneInfo of a user's profile timezone,
+    UTC when the user has no profile or an unknown zone
+    """
+    try:
+        return get_timezone(user.profile.timezone)
+    except user._meta.model.profile.RelatedObjectDoesNotExist:
+        return ZoneInfo("UTC")
+
+
+def group_users_by_timezone(user_ids):
+    """
+    Utility function to group user ids by the ZoneInfo of their profile
+    timezone, in one query
+    """
+    from django.contrib.auth import get_user_model
+
+    groups = {}
+    users = get_user_model().objects.filter(id__in=user_ids)
+    for user_id, tz_name in users.values_list("id", "profile__timezone"):
+        groups.setdefault(get_timezone(tz_name), []).append(user_id)
+    return groups
 
 
 client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
@@ -1,20 +1,17 @@
-import csv
 import os
 import tempfile
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from dateutil.relativedelta import relativedelta
-from django.core.cache import cache
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Q, Sum
-from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.db.models import Q
 from django.http import StreamingHttpResponse
 from django_filters import rest_framework as filters
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -25,17 +22,20 @@ from Tracker.models import (
     CategoryBudget,
     CurrencyExchangeRate,
     GeneralBudget,
+    ImportJob,
     RecurringTransaction,
     SavingPlan,
     Transaction,
     Type,
 )
 from Tracker.serializers import (
+    BulkCreateTransactionSerializer,
     BulkDeleteSerializer,
     CategorySerializer,
     CategoryBudgetSerializer,
-    DashboardTransactionSerializer,
     GeneralBudgetSerializer,
+    ImportJobSerializer,
+    ImportTransactionsSerializer,
     ListTransactionSerializer,
     MakeRecurringSerializer,
     RecurringTransactionSerializer,
@@ -43,29 +43,35 @@ from Tracker.serializers import (
     TransactionSerializer,
 )
 
+from .cache import (
+    BUDGETS,
+    PENDING,
+    TRANSACTIONS,
+    get_transaction_side_effects,
+    invalidate_dashboard_cache,
+)
+from .dashboard import DEFAULT_PERIOD, get_dashboard, parse_sections
+from .exporters import OUTPUTS as EXPORT_OUTPUTS
+from .exporters import export_transactions
+from .importers import detect_format, run_import
+from .pagination import HybridPagination
+from .search import search_transactions
 from .services import (
     BudgetService,
+    DailySummaryService,
     SavingPlanService,
     SavingsService,
     TransactionService,
 )
 from .utils import (
-    convert_currency,
     create_error_response,
     create_success_response,
     create_transaction_response,
     extract_transaction_data,
+    get_user_timezone,
     validate_category_exists,
 )
 
-CACHE_TTL = 300
-CACHE_PREFIX = "dashboard_"
-
-
-def invalidate_dashboard_cache(user_id):
-    cache.delete(f"{CACHE_PREFIX}{user_id}")
-
-
 # ── ViewSets (Standard Resources) ──
 
 
@@ -87,6 +93,14 @@ class CategoryViewSet(viewsets.ModelViewSet):
             tag=serializer.validated_data.get("name", "").lower(),
         )
 
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_dashboard_cache(self.request.user.id, TRANSACTIONS)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_dashboard_cache(self.request.user.id, TRANSACTIONS)
+
 
 class TransactionFilter(filters.FilterSet):
     search = filters.CharFilter(method="filter_search")
@@ -113,18 +127,26 @@ class TransactionFilter(filters.FilterSet):
         ]
 
     def filter_search(self, queryset, name, value):
-        return queryset.filter(
-            Q(party_name__icontains=value) | Q(notes__icontains=value)
-        )
+        return search_transactions(queryset, value)
+
+
+class TransactionOrderingFilter(OrderingFilter):
+    # ?ordering=rank only applies to ?search= results, which carry the rank
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        valid = super().remove_invalid_fields(queryset, fields, view, request)
+        if "rank" in queryset.query.annotations:
+            return valid
+        return [term for term in valid if term.lstrip("-") != "rank"]
 
 
 @extend_schema(tags=["Transactions"])
 class TransactionViewSet(viewsets.ModelViewSet):
-    pagination_class = PageNumberPagination
+    pagination_class = HybridPagination
     page_size = 20
-    filter_backends = [filters.DjangoFilterBackend, OrderingFilter]
+    filter_backends = [filters.DjangoFilterBackend, TransactionOrderingFilter]
     filterset_class = TransactionFilter
-    ordering_fields = ["amount", "transaction_date", "created_at"]
+    ordering_fields = ["amount", "transaction_date", "created_at", "rank"]
     ordering = ["-transaction_date"]
 
     def get_serializer_class(self):
@@ -152,19 +174,18 @@ class TransactionViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
-        invalidate_dashboard_cache(self.request.user.id)
+        invalidate_dashboard_cache(self.request.user.id, TRANSACTIONS)
 
     def perform_update(self, serializer):
         serializer.save()
-        invalidate_dashboard_cache(self.request.user.id)
+        invalidate_dashboard_cache(self.request.user.id, TRANSACTIONS)
 
     def perform_destroy(self, instance):
         instance.is_deleted = True
         instance.save()
-        invalidate_dashboard_cache(self.request.user.id)
+        invalidate_dashboard_cache(self.request.user.id, TRANSACTIONS)
 
     def create(self, request, *args, **kwargs):
-        invalidate_dashboard_cache(request.user.id)
         data, parse_error = TransactionService.parse_receipt_if_uploaded(request)
         if parse_error:
             return create_error_response(parse_error)
@@ -209,15 +230,50 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     data, request.user, category, amount, transaction_instance
                 )
 
+            invalidate_dashboard_cache(request.user.id, TRANSACTIONS)
+            if settings.TRANSACTION_SIDE_EFFECTS_ASYNC:
+                TransactionService.queue_side_effects(transaction_instance.id)
+                return create_transaction_response(
+                    serializer.data,
+                    None,
+                    None,
+                    recurring_message,
+                    side_effects=PENDING,
+                )
             savings_message = SavingsService.process_savings_from_income(
                 transaction_instance
             )
-            limit_message = BudgetService.get_general_limit_status(request.user)
 
+        # Outside the atomic block so the period scan holds no row locks
+        limit_message = BudgetService.get_general_limit_status(request.user)
         return create_transaction_response(
             serializer.data, limit_message, savings_message, recurring_message
         )
 
+    @extend_schema(
+        methods=["GET"],
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "status": {"type": "string"},
+                    "limit": {"type": "string"},
+                    "savings_message": {"type": "string"},
+                },
+            }
+        },
+    )
+    @action(detail=True, methods=["get"])
+    def side_effects(self, request, pk=None):
+        txn = self.get_object()
+        result = get_transaction_side_effects(txn.id)
+        if result is None:
+            return create_error_response(
+                "No side effect results for this transaction",
+                status.HTTP_404_NOT_FOUND,
+            )
+        return create_success_response("Side effects retrieved successfully", result)
+
     @extend_schema(
         methods=["POST"],
         request=None,
@@ -237,7 +293,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
             txn = Transaction.objects.get(id=pk, user=request.user, is_deleted=True)
             txn.is_deleted = False
             txn.save()
-            invalidate_dashboard_cache(request.user.id)
+            invalidate_dashboard_cache(request.user.id, TRANSACTIONS)
             return create_success_response("Transaction restored successfully")
         except Transaction.DoesNotExist:
             return create_error_response(
@@ -262,10 +318,13 @@ class TransactionViewSet(viewsets.ModelViewSet):
         serializer = BulkDeleteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         ids = serializer.validated_data["ids"]
-        deleted_count = Transaction.objects.filter(
-            id__in=ids, user=request.user
-        ).update(is_deleted=True)
-        invalidate_dashboard_cache(request.user.id)
+        queryset = Transaction.objects.filter(id__in=ids, user=request.user)
+        with transaction.atomic():
+            DailySummaryService.remove_queryset(
+                queryset.select_for_update(), get_user_timezone(request.user)
+            )
+            deleted_count = queryset.update(is_deleted=True)
+        invalidate_dashboard_cache(request.user.id, TRANSACTIONS)
         return Response(
             {
                 "status": "success",
@@ -274,6 +333,170 @@ class TransactionViewSet(viewsets.ModelViewSet):
             }
         )
 
+    @extend_schema(
+        methods=["POST"],
+        request=BulkCreateTransactionSerializer,
+        responses={
+            201: {
+                "type": "object",
+                "properties": {
+                    "status": {"type": "string"},
+                    "created_count": {"type": "integer"},
+                    "data": {"type": "array", "items": {"type": "object"}},
+                    "errors": {"type": "array", "items": {"type": "object"}},
+                    "limit": {"type": "string"},
+                    "savings_messages": {"type": "array", "items": {"type": "string"}},
+                },
+            }
+        },
+    )
+    @action(detail=False, methods=["post"])
+    def bulk_create(self, request):
+        serializer = BulkCreateTransactionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        created, errors, savings_messages = (
+            TransactionService.bulk_create_transactions(
+                request.user, serializer.validated_data["transactions"]
+            )
+        )
+        if not created:
+            return Response(
+                {
+                    "status": "error",
+                    "message": "No transactions were added",
+                    "errors": errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Evaluated once for the whole batch, after the insert has committed
+        limit_message = BudgetService.get_general_limit_status(request.user)
+        return Response(
+            {
+                "status": "success",
+                "message": f"{len(created)} transaction(s) added",
+                "created_count": len(created),
+                "data": TransactionSerializer(
+                    created, many=True, context={"request": request}
+                ).data,
+                "errors": errors,
+                "limit": limit_message,
+                "savings_messages": savings_messages,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        methods=["POST"],
+        request={"multipart/form-data": ImportTransactionsSerializer},
+        responses={201: ImportJobSerializer, 202: ImportJobSerializer},
+    )
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_file(self, request):
+        from Tracker.tasks import import_transactions
+
+        serializer = ImportTransactionsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        import_format = detect_format(upload.name, serializer.validated_data.get("format"))
+        if import_format is None:
+            return create_error_response("Unsupported file format, use csv, ofx or qif")
+
+        job = ImportJob.objects.create(
+            user=request.user,
+            file=upload,
+            format=import_format,
+            dayfirst=serializer.validated_data["dayfirst"],
+        )
+        if upload.size <= settings.TRANSACTION_IMPORT_SYNC_MAX_BYTES:
+            run_import(job)
+            if job.status == "Failed":
+                return create_error_response(job.message, status.HTTP_400_BAD_REQUEST)
+            return create_success_response(
+                "Import finished",
+                ImportJobSerializer(job).data,
+                status.HTTP_201_CREATED,
+            )
+
+        transaction.on_commit(lambda: import_transactions.delay(job.id))
+        return create_success_response(
+            "Import queued, poll the job for progress",
+            ImportJobSerializer(job).data,
+            status.HTTP_202_ACCEPTED,
+        )
+
+    @extend_schema(methods=["GET"], responses={200: ImportJobSerializer})
+    @action(detail=False, methods=["get"], url_path=r"import/(?P<job_id>\d+)")
+    def import_status(self, request, job_id=None):
+        try:
+            job = ImportJob.objects.get(id=job_id, user=request.user)
+        except ImportJob.DoesNotExist:
+            return create_error_response(
+                "Import job not found", status.HTTP_404_NOT_FOUND
+            )
+        return create_success_response(
+            "Import job retrieved successfully", ImportJobSerializer(job).data
+        )
+
+    @extend_schema(
+        methods=["GET"],
+        parameters=[
+            OpenApiParameter(
+                name="deleted",
+                description="Filter by deleted status: true/false/all",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="output",
+                description="Export format: csv (default), ndjson or parquet",
+                required=False,
+                type=str,
+                enum=list(EXPORT_OUTPUTS),
+            ),
+            OpenApiParameter(
+                name="compress",
+                description="Set to 'gzip' to gzip the file on the fly",
+                required=False,
+                type=str,
+                enum=["gzip"],
+            ),
+        ],
+        responses={
+            200: {
+                "type": "string",
+                "content": {
+                    "text/csv": {},
+                    "application/x-ndjson": {},
+                    "application/vnd.apache.parquet": {},
+                    "application/gzip": {},
+                },
+            }
+        },
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        output = request.query_params.get("output", "csv").lower()
+        compress = request.query_params.get("compress", "").lower()
+        if output not in EXPORT_OUTPUTS:
+            return create_error_response(
+                f"Unsupported output; use one of: {', '.join(EXPORT_OUTPUTS)}",
+                status.HTTP_400_BAD_REQUEST,
+            )
+        if compress not in ("", "gzip"):
+            return create_error_response(
+                "Unsupported compression; use gzip", status.HTTP_400_BAD_REQUEST
+            )
+
+        chunks, content_type, filename = export_transactions(
+            self.filter_queryset(self.get_queryset()),
+            output=output,
+            gzip=compress == "gzip",
+        )
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
     @extend_schema(
         methods=["GET"],
         parameters=[
@@ -288,26 +511,12 @@ class TransactionViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["get"])
     def export_csv(self, request):
-        user = request.user
-        qs = self.filter_queryset(self.get_queryset()).select_related(
-            "category", "savings"
+        # Kept for existing clients; same as export with the default CSV output
+        chunks, content_type, filename = export_transactions(
+            self.filter_queryset(self.get_queryset())
         )
-
-        def stream():
-            writer = csv.writer(open(os.devnull, "w"))
-            yield "id,date,type,party,amount,currency,category,notes,savings_plan,savings_status\n"
-            for txn in qs.iterator():
-                yield (
-                    f"{txn.id},{txn.transaction_date},{txn.type},{txn.party_name},"
-                    f"{txn.amount},{txn.currency},"
-                    f"{txn.category.name if txn.category else ''},"
-                    f"{txn.notes if txn.notes else ''},"
-                    f"{txn.savings.name if txn.savings else ''},"
-                    f"{txn.savings.status if txn.savings else ''}\n"
-                )
-
-        response = StreamingHttpResponse(stream(), content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="transactions.csv"'
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
         return response
 
     @extend_schema(
@@ -360,7 +569,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
 
         txn.recurring = True
         txn.save(update_fields=["recurring"])
-        invalidate_dashboard_cache(request.user.id)
+        invalidate_dashboard_cache(request.user.id, TRANSACTIONS)
 
         return create_success_response(msg)
 
@@ -397,6 +606,15 @@ class GeneralBudgetViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        invalidate_dashboard_cache(self.request.user.id, BUDGETS)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_dashboard_cache(self.request.user.id, BUDGETS)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_dashboard_cache(self.request.user.id, BUDGETS)
 
 
 @extend_schema(tags=["Budgets"])
@@ -430,6 +648,18 @@ class CategoryBudgetViewSet(viewsets.ModelViewSet):
             status.HTTP_201_CREATED,
         )
 
+    @extend_schema(
+        methods=["GET"],
+        responses={200: {"type": "object"}},
+        description="Spent, remaining and percentage used for every category budget in its current period",
+    )
+    @action(detail=False, methods=["get"], url_path="status")
+    def budget_status(self, request):
+        return create_success_response(
+            "Category budget status retrieved successfully",
+            BudgetService.get_category_budget_statuses(request.user),
+        )
+
 
 @extend_schema(tags=["Saving Plans"])
 class SavingPlanViewSet(viewsets.ModelViewSet):
@@ -443,6 +673,11 @@ class SavingPlanViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user, status="Active")
 
+    def perform_destroy(self, instance):
+        # The plan's transactions are deleted with it
+        instance.delete()
+        invalidate_dashboard_cache(self.request.user.id, TRANSACTIONS)
+
 
 # ── APIViews (Action Endpoints) ──
 
@@ -453,178 +688,31 @@ class DashboardOverview(APIView):
         parameters=[
             OpenApiParameter(
                 "period", str, required=False, description="1W, 1M, 3M, 1Y, all"
-            )
+            ),
+            OpenApiParameter(
+                "sections",
+                str,
+                required=False,
+                description=(
+                    "Comma-separated subset of totals, expense_distribution, "
+                    "expense_chart, budget, latest_transactions (default: all)"
+                ),
+            ),
         ],
         responses={200: {"type": "object"}},
         description="Get aggregated dashboard overview with currency conversion to user's base currency",
     )
     def get(self, request: Request):
         user = request.user
-        now = datetime.now()
-        today = now.date()
-
+        period = request.query_params.get("period", DEFAULT_PERIOD)
         try:
-            base_currency = user.profile.base_currency
-        except user._meta.model.profile.RelatedObjectDoesNotExist:
-            base_currency = "NGN"
-
-        period = request.query_params.get("period", "1M")
-        start_date = {
-            "1W": today - timedelta(days=7),
-            "1M": today - relativedelta(months=1),
-            "3M": today - relativedelta(months=3),
-            "1Y": today - relativedelta(years=1),
-            "all": None,
-        }.get(period, today - relativedelta(months=1))
-
-        cache_key = f"{CACHE_PREFIX}{user.id}_{period}"
-        cached = cache.get(cache_key)
-        if cached:
-            return create_success_response(
-                "Dashboard data retrieved successfully", cached
-            )
-
-        transactions = Transaction.objects.filter(
-            user=user,
-            is_deleted=False,
-            transaction_date__isnull=False,
-        ).select_related("category")
-
-        period_qs = transactions
-        if start_date:
-            period_qs = transactions.filter(transaction_date__date__gte=start_date)
-
-        totals = period_qs.values("type", "currency").annotate(total=Sum("amount"))
-        monthly_income = 0
-        monthly_expenses = 0
-        for entry in totals:
-            converted = convert_currency(
-                entry["total"], entry["currency"], base_currency
-            )
-            if entry["type"] == "Income":
-                monthly_income += converted
-            else:
-                monthly_expenses += converted
-
-        days_in_period = (today - start_date).days if start_date else today.day
-        daily_average = round(monthly_expenses / max(1, days_in_period), 2)
-
-        expense_qs = period_qs.filter(type="Expense", category__isnull=False)
-        category_totals_raw = (
-            expense_qs.values("category__name", "currency")
-            .annotate(total=Sum("amount"))
-            .order_by("-total")
-        )
-        category_agg = {}
-        for item in category_totals_raw:
-            name = item["category__name"]
-            converted = convert_currency(item["total"], item["currency"], base_currency)
-            category_agg[name] = category_agg.get(name, 0) + converted
-
-        expense_distribution = [
-            {"name": name, "amount": round(amount, 2)}
-            for name, amount in sorted(category_agg.items(), key=lambda x: -x[1])
-        ]
-        top_category = expense_distribution[0]["name"] if expense_distribution else None
-
-        # Dynamic expense chart
-        if period in ("1W", "1M"):
-            trunc_fn = TruncDate("transaction_date")
-            step = timedelta(days=1)
-            label_fmt = "%b %d"
-            cursor = start_date
-        elif period == "3M":
-            trunc_fn = TruncWeek("transaction_date")
-            step = timedelta(weeks=1)
-            label_fmt = "%b %d"
-            cursor = start_date - timedelta(days=start_date.weekday())
-        else:
-            trunc_fn = TruncMonth("transaction_date")
-            step = relativedelta(months=1)
-            label_fmt = "%b %Y"
-            earliest = transactions.earliest("transaction_date").transaction_date.date()
-            base = start_date if start_date else earliest
-            cursor = base.replace(day=1)
-
-        chart_raw = (
-            expense_qs.annotate(period_label=trunc_fn)
-            .values("period_label", "currency")
-            .annotate(total=Sum("amount"))
-            .order_by("period_label")
+            sections = parse_sections(request.query_params.get("sections"))
+        except ValueError as e:
+            return create_error_response(str(e))
+        data, stale = get_dashboard(user, period, sections)
+        return create_success_response(
+            "Dashboard data retrieved successfully", {**data, "stale": stale}
         )
-        period_totals = {}
-        for item in chart_raw:
-            key = item["period_label"]
-            if key:
-                if isinstance(key, datetime):
-                    key = key.date()
-                converted = convert_currency(
-                    item["total"], item["currency"], base_currency
-                )
-                period_totals[key] = period_totals.get(key, 0) + converted
-
-        chart_labels = []
-        chart_values = []
-        while cursor <= today:
-            chart_labels.append(cursor.strftime(label_fmt))
-            chart_values.append(round(period_totals.get(cursor, 0), 2))
-            cursor += step
-
-        MAX_BARS = 60
-        if len(chart_labels) > MAX_BARS:
-            step_size = len(chart_labels) // MAX_BARS
-            chart_labels = chart_labels[::step_size][:MAX_BARS]
-            chart_values = [
-                sum(chart_values[i : i + step_size])
-                for i in range(0, len(chart_values), step_size)
-            ][:MAX_BARS]
-
-        latest_transactions = transactions.select_related("savings").order_by(
-            "-created_at"
-        )[:5]
-
-        general_limit = GeneralBudget.objects.filter(user=user).first()
-        budget_summary = None
-        if general_limit is not None:
-            budget_limit_converted = convert_currency(
-                float(general_limit.amount), "NGN", base_currency
-            )
-            budget_summary = {
-                "plan": general_limit.period,
-                "limit": round(budget_limit_converted, 2),
-                "spent": round(monthly_expenses, 2),
-                "remaining": round(
-                    max(budget_limit_converted - monthly_expenses, 0), 2
-                ),
-            }
-
-        weekly_transactions = transactions.filter(
-            transaction_date__date__gte=today - timedelta(days=7)
-        ).count()
-        total_transactions = transactions.count()
-
-        data = {
-            "base_currency": base_currency,
-            "overview": {
-                "monthly_income": round(monthly_income, 2),
-                "monthly_expenses": round(monthly_expenses, 2),
-                "daily_average": daily_average,
-                "top_category": top_category,
-                "total_transactions": total_transactions,
-                "weekly_transactions": weekly_transactions,
-                "budget": budget_summary,
-                "expense_distribution": expense_distribution,
-                "expense_chart": {
-                    "labels": chart_labels,
-                    "values": chart_values,
-                },
-            },
-            "latest_transactions": DashboardTransactionSerializer(
-                latest_transactions, many=True
-            ).data,
-        }
-        cache.set(cache_key, data, CACHE_TTL)
-        return create_success_response("Dashboard data retrieved successfully", data)
 
 
 class AiClient(APIView):
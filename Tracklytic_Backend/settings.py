@@ -281,6 +281,30 @@ CACHES = {
     }
 }
 
+# Serve the last dashboard payload while a Celery task recomputes expired entries
+DASHBOARD_STALE_WHILE_REVALIDATE = (
+    os.getenv("DASHBOARD_STALE_WHILE_REVALIDATE", "False").lower() == "true"
+)
+
+# Compute and cache every dashboard period together on a miss
+DASHBOARD_BUNDLE_PERIODS = (
+    os.getenv("DASHBOARD_BUNDLE_PERIODS", "False").lower() == "true"
+)
+
+# Longest dashboard chart series, and how longer ones are reduced: "sum"
+# merges consecutive buckets, "lttb" keeps the most shape-defining points
+DASHBOARD_CHART_MAX_POINTS = int(os.getenv("DASHBOARD_CHART_MAX_POINTS", "60"))
+DASHBOARD_CHART_DOWNSAMPLE = os.getenv("DASHBOARD_CHART_DOWNSAMPLE", "sum")
+
+# Run post-create savings processing and budget checks in a Celery task
+TRANSACTION_SIDE_EFFECTS_ASYNC = (
+    os.getenv("TRANSACTION_SIDE_EFFECTS_ASYNC", "False").lower() == "true"
+)
+# Statement imports up to this size run in the request; larger ones in Celery
+TRANSACTION_IMPORT_SYNC_MAX_BYTES = int(
+    os.getenv("TRANSACTION_IMPORT_SYNC_MAX_BYTES", "262144")
+)
+
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
@@ -300,4 +324,12 @@ CELERY_BEAT_SCHEDULE = {
         "task": "Tracker.tasks.update_exchange_rates",
         "schedule": crontab(hour="*/6", minute=0),
     },
+    "reconcile-budget-counters-nightly": {
+        "task": "Tracker.tasks.reconcile_budget_counters",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    "evaluate-budgets-nightly": {
+        "task": "Tracker.tasks.evaluate_budgets",
+        "schedule": crontab(hour=2, minute=0),
+    },
 }